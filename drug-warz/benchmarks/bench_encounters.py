@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core import PRODUCT_NAMES, Player  # noqa: E402
+from encounters import EncounterTable  # noqa: E402
+
+# One trip for a batch of players, rolled per player the way Game.travel does
+# it against one vectorized EncounterTable.sample_travel draw. Then the
+# expected money after a number of trips, estimated by playing them out
+# against the closed form from expected_after_trips. Money is in cents, as
+# games keep it.
+
+STARTING_MONEY = 1000000
+
+
+def best_of(repeats, func):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def loop_travel(table, players, rng):
+    # Every player runs from every encounter, as in Game.random_encounter
+    for player in players:
+        for type in table.types:
+            if rng.random() < table.chance(type):
+                if rng.random() >= table.escape_chance(type, "run"):
+                    player.lose(table.loss_fraction)
+                    break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-player vs vectorized encounter rolls, and Monte Carlo vs closed form.")
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--trips", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    table = EncounterTable()
+    rng = random.Random(0)
+    generator = np.random.default_rng(0)
+    products = len(PRODUCT_NAMES)
+    players = [Player(PRODUCT_NAMES, STARTING_MONEY) for _ in range(args.players)]
+    for player in players:
+        player.inventory[0] = 100
+    money = np.full(args.players, STARTING_MONEY, dtype=np.int64)
+    inventory = np.zeros((args.players, products), dtype=np.int64)
+    inventory[:, 0] = 100
+
+    loop_time = best_of(args.repeats, lambda: loop_travel(table, players, rng))
+    vector_time = best_of(args.repeats, lambda: table.sample_travel(money, inventory, rng=generator))
+    print(f"One trip for {args.players:,} players")
+    print(f"  Per-player loop: {loop_time * 1000:9.2f} ms ({args.players / loop_time:,.0f} players/sec)")
+    print(f"  Vectorized:      {vector_time * 1000:9.2f} ms ({args.players / vector_time:,.0f} players/sec)")
+    print(f"  Speedup: {loop_time / vector_time:.1f}x")
+
+    start = time.perf_counter()
+    money = np.full(args.players, STARTING_MONEY, dtype=np.int64)
+    inventory = np.zeros((args.players, products), dtype=np.int64)
+    inventory[:, 0] = 100
+    for _ in range(args.trips):
+        table.sample_travel(money, inventory, rng=generator)
+    monte_carlo_time = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = table.expected_after_trips(STARTING_MONEY, [100] + [0] * (products - 1), args.trips)
+    exact_time = time.perf_counter() - start
+    print(f"Expected money and {PRODUCT_NAMES[0]} after {args.trips} trips")
+    print(f"  Monte Carlo ({args.players:,} players): ${money.mean() / 100:.2f}, {inventory[:, 0].mean():.3f} "
+          f"in {monte_carlo_time * 1000:.1f} ms")
+    print(f"  Closed form:                   ${expected.money / 100:.2f}, {expected.inventory[0]:.3f} "
+          f"in {exact_time * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+from tkinter import simpledialog, messagebox
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, GAME_DIR)
+
+import drug_warz_2  # noqa: E402
+
+# Plays a scripted game in the tkinter front end and prints the per-turn
+# display cost in 10-day buckets, then the frame tick report. The cost should
+# stay flat from the first day to the last, and the window keeps ticking while
+# markets update on the worker thread. Needs a display, Pillow and
+# images/background.png. The game runs in a scratch directory with a copy of
+# images/, so its leaderboard, journal and save don't touch the real ones.
+
+
+def script_dialogs(days):
+    # Answer the startup and game-over dialogs instead of waiting for a person
+    answers = {"Name": "bench", "Duration": f"{days} days"}
+    simpledialog.askstring = lambda title, prompt, **kw: answers.get(title)
+    for name in ("showinfo", "showerror", "showwarning"):
+        setattr(messagebox, name, lambda *args, **kw: None)
+
+
+def answer(prompt, rng):
+    # Everything during play is asked in the game's own panel
+    if prompt.startswith("You have encountered"):
+        return rng.choice(["fight", "run"])
+    if prompt.startswith("Choose a town"):
+        return str(rng.randint(0, 3))
+    if prompt.startswith("Enter"):
+        return str(rng.randint(1, 8))
+    return rng.choice(["travel", "buy", "sell"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn display cost of the tkinter front end.")
+    parser.add_argument("--days", type=int, default=90, choices=[30, 45, 90])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        shutil.copytree(os.path.join(GAME_DIR, "images"), os.path.join(scratch, "images"))
+        os.chdir(scratch)
+        try:
+            play(args)
+        finally:
+            os.chdir(GAME_DIR)
+
+
+def play(args):
+    rng = random.Random(args.seed)
+    script_dialogs(args.days)
+    drug_warz_2.new_seed = lambda: args.seed
+    game = drug_warz_2.Game()
+    while game.days_left > 0:
+        game.root.update()  # Run ticks, and deliver the worker's results when they are ready
+        if not game.busy:
+            game.action_entry.insert(0, answer(game.action_label.cget("text"), rng))
+            game.submit()
+    times = game.frame_times
+    for start in range(0, len(times), 10):
+        bucket = times[start:start + 10]
+        print(f"Days {start + 1:3}-{start + len(bucket):3}: {1000 * sum(bucket) / len(bucket):7.3f} ms/turn")
+    print(game.frame_time_report())
+    game.root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core import DURATIONS  # noqa: E402
+from leaderboard import Leaderboard  # noqa: E402
+
+# Fills a leaderboard with simulated-looking scores in bulk and times the
+# queries the game and the leaderboard CLI make: top-k, the rank shown at game
+# over, percentiles and a seed lookup. Pass --path to keep the database and
+# reuse it (rows are only added when it has fewer than --rows).
+
+
+def timed(repeat, function, *args):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def fill(board, rows, batch, rng):
+    have = board.count()
+    start = time.perf_counter()
+    with board.bulk(rows - have):
+        for first in range(have, rows, batch):
+            count = min(batch, rows - first)
+            board.add_many((f"bot {i % 3}", DURATIONS[i % 3], i, int(rng.lognormvariate(14, 1.2)))
+                           for i in range(first, first + count))
+    return rows - have, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaderboard ingestion and query benchmark.")
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--batch", type=int, default=100000, help="games per transaction")
+    parser.add_argument("--path", default=None, help="database file (default: a temporary one)")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.path or os.path.join(directory, "leaderboard.db")
+        with Leaderboard(path) as board:
+            added, elapsed = fill(board, args.rows, args.batch, rng)
+            if added:
+                print(f"Inserted {added:,} games in {elapsed:.1f}s ({added / elapsed:,.0f} games/sec)")
+            print(f"{board.count():,} games, {os.path.getsize(path) / 1e6:.0f} MB")
+
+            top_time, _ = timed(args.queries, board.top, 10, 30)
+            print(f"  Top 10 of 30-day games:  {top_time * 1000:8.3f} ms")
+            top_time, _ = timed(args.queries, board.top, 10)
+            print(f"  Top 10 overall:          {top_time * 1000:8.3f} ms")
+
+            scores = [int(rng.lognormvariate(14, 1.2)) for _ in range(args.queries)]
+            start = time.perf_counter()
+            for score in scores:
+                board.rank(score, 45)
+            rank_time = (time.perf_counter() - start) / len(scores)
+            print(f"  Rank among 45-day games: {rank_time * 1000:8.3f} ms (random scores)")
+            start = time.perf_counter()
+            for score in scores:
+                board.rank(score)
+            rank_time = (time.perf_counter() - start) / len(scores)
+            print(f"  Rank overall:            {rank_time * 1000:8.3f} ms")
+
+            for percent in (50, 90, 99):
+                percentile_time, score = timed(10, board.percentile, percent, 90)
+                print(f"  {percent}th percentile (90-day): {percentile_time * 1000:8.3f} ms (${score / 100:,.2f})")
+            seed_time, _ = timed(args.queries, board.by_seed, args.rows // 2)
+            print(f"  Games on one seed:       {seed_time * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
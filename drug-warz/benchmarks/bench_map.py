@@ -0,0 +1,62 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from world_map import WorldMap  # noqa: E402
+
+# Load time for a big generated map and route-query throughput on it. The
+# first question from a town works out its routes (Dijkstra over the whole
+# map); later ones from the same town are array lookups.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="World map load and route query benchmark.")
+    parser.add_argument("--towns", type=int, default=20000, help="rounded down to a square grid")
+    parser.add_argument("--sources", type=int, default=64, help="distinct towns to travel from")
+    parser.add_argument("--queries", type=int, default=1000000)
+    args = parser.parse_args()
+
+    side = int(args.towns ** 0.5)
+    world = WorldMap.grid(side, side, seed=0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "map.json")
+        world.save(path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        world = WorldMap.load(path, cache_size=args.sources)
+        load_time = time.perf_counter() - start
+    roads = len(world.neighbors) // 2
+    print(f"{world.town_count:,} towns, {roads:,} roads, {size / 1e6:.1f} MB map file")
+    print(f"  Load:           {load_time * 1000:9.1f} ms")
+
+    rng = random.Random(0)
+    sources = rng.sample(range(world.town_count), min(args.sources, world.town_count))
+    start = time.perf_counter()
+    for source in sources:
+        world.routes_from(source)
+    cold_time = time.perf_counter() - start
+    print(f"  First query:    {cold_time / len(sources) * 1000:9.2f} ms per town ({len(sources)} towns)")
+
+    pairs = [(rng.choice(sources), rng.randrange(world.town_count)) for _ in range(args.queries)]
+    travel_days = world.travel_days
+    start = time.perf_counter()
+    for a, b in pairs:
+        travel_days(a, b)
+    warm_time = time.perf_counter() - start
+    print(f"  Cached queries: {warm_time / args.queries * 1e9:9.0f} ns each ({args.queries / warm_time:,.0f}/sec)")
+
+    start = time.perf_counter()
+    hops = 0
+    for a, b in pairs[:10000]:
+        hops += len(world.route(a, b))
+    route_time = time.perf_counter() - start
+    print(f"  Full routes:    {route_time / 10000 * 1e6:9.1f} us each ({hops / 10000:.0f} towns on average)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from market import Market  # noqa: E402
+from prices import PriceTable  # noqa: E402
+from streams import Stream  # noqa: E402
+
+# Compares one day of price updates in the games' PriceTables, one per game,
+# against the vectorized Market. Both sides do the same work: every product of every
+# town of every game gets a new price, a change percentage and a color.
+
+
+def best_of(repeats, func):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def table_update(tables):
+    for table in tables:
+        table.update_prices()
+
+
+def table_day(tables):
+    for table in tables:
+        table.update_prices()
+        for town in table.towns():
+            for product in town.products:
+                change = product.price_change_percentage()
+                color = "green" if change > 0 else "red" if change < 0 else "black"  # noqa: F841
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PriceTable vs vectorized market update benchmark.")
+    parser.add_argument("--towns", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = Stream.for_subsystem(0, "market")
+    cells = args.games * args.towns * args.products
+    town_names = [f"Town {i}" for i in range(args.towns)]
+    product_names = [str(i) for i in range(args.products)]
+    tables = [PriceTable(town_names, product_names, [rng.randint(5, 50) * 100 for _ in product_names], rng)
+              for _ in range(args.games)]
+    market = Market.random(args.towns, args.products, games=args.games, seed=0)
+
+    def vector_day():
+        market.update_prices()
+        market.colors(market.price_change_percentage())
+
+    print(f"{args.games} games x {args.towns} towns x {args.products} products = {cells:,} prices")
+    cases = [
+        ("update_prices", lambda: table_update(tables), market.update_prices),
+        ("update + change % + colors", lambda: table_day(tables), vector_day),
+    ]
+    for name, table_func, vector_func in cases:
+        table_time = best_of(args.repeats, table_func)
+        vector_time = best_of(args.repeats, vector_func)
+        print(name)
+        print(f"  PriceTable:      {table_time * 1000:9.2f} ms/day ({cells / table_time:,.0f} prices/sec)")
+        print(f"  Vectorized:      {vector_time * 1000:9.2f} ms/day ({cells / vector_time:,.0f} prices/sec)")
+        print(f"  Speedup: {table_time / vector_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from drug_warz import Town  # noqa: E402
+from prices import PriceTable  # noqa: E402
+from streams import Stream  # noqa: E402
+
+# Memory per town-product for the price state of a large map, as the game
+# builds it: one PriceTable with the last week of every price, and a Town view
+# per town. ObjectProduct is the layout before the table: one object per
+# town-product holding its own prices, without even the week of history.
+
+PRODUCT_NAMES = ['Weed', 'Heroin', 'XTC', 'Acid', 'Cocaine', 'Fentynal', 'Xanax', 'Meth']
+
+
+class ObjectProduct:
+    __slots__ = ("id", "name", "base_price", "rng", "current_price", "previous_price")
+
+    def __init__(self, name, base_price, rng, id=0):
+        self.id = id
+        self.name = name
+        self.base_price = base_price
+        self.rng = rng
+        self.current_price = round(base_price * rng.uniform(0.8, 1.2))
+        self.previous_price = self.current_price
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    world = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return world, after - before
+
+
+def build_objects(town_names, base_prices, rng):
+    return [[ObjectProduct(name, base_price, rng, i) for i, (name, base_price) in enumerate(zip(PRODUCT_NAMES, base_prices))]
+            for _ in town_names]
+
+
+def build_table(town_names, base_prices, rng):
+    table = PriceTable(town_names, PRODUCT_NAMES, base_prices, rng)
+    return table, table.towns(Town)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory used by per-town price state.")
+    parser.add_argument("--towns", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = Stream.for_subsystem(0, "market")
+    base_prices = [rng.randint(5, 50) * 100 for _ in PRODUCT_NAMES]
+    town_names = [f"Town {i}" for i in range(args.towns)]  # Made up front: the map owns them
+    cases = [
+        ("Product objects (before)", lambda: build_objects(town_names, base_prices, rng)),
+        ("PriceTable and Town views", lambda: build_table(town_names, base_prices, rng)),
+    ]
+    cells = args.towns * len(PRODUCT_NAMES)
+    print(f"{args.towns:,} towns x {len(PRODUCT_NAMES)} products")
+    for name, build in cases:
+        world, size = measure(build)
+        print(f"{name:30} {size / 1024 / 1024:8.2f} MiB  {size / cells:7.1f} bytes per town-product")
+        del world
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core import Rules, cents  # noqa: E402
+from oracle import solve, price_schedule  # noqa: E402
+from world_map import WorldMap, MAP_DIR  # noqa: E402
+
+# Time the oracle takes on the default map, on maps whose roads take several
+# days, and on a big one-day map. Each world has a time budget well above what
+# it takes here; going over one exits with status 1, so a change that brings
+# back the old blowup on weighted maps (87 s for the 5x5 grid) fails loudly.
+# --scale stretches every budget for slower machines.
+
+
+def worlds():
+    # (name, rules, world map or None for one day everywhere, seconds allowed)
+    grid_4 = WorldMap.grid(4, 4, seed=1)
+    grid_5 = WorldMap.grid(5, 5, seed=1)
+    road_trip = WorldMap.load(os.path.join(MAP_DIR, "road_trip.json"))
+    big = Rules(duration=90, town_names=[f"Town {i}" for i in range(1000)],
+                product_names=[f"Product {i}" for i in range(20)])
+    return [
+        ("default map, 90 days", Rules(duration=90), None, 5),
+        ("road_trip.json, 90 days", Rules(duration=90, world_map=road_trip), road_trip, 5),
+        ("4x4 grid, 45 days", Rules(duration=45, world_map=grid_4), grid_4, 5),
+        ("5x5 grid, 90 days", Rules(duration=90, world_map=grid_5), grid_5, 20),
+        ("1000 towns x 20 products, 90 days", big, None, 30),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Oracle solve time on small, weighted and big maps.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every time budget by this")
+    args = parser.parse_args()
+
+    over = []
+    for name, rules, world_map, budget in worlds():
+        schedule = price_schedule(args.seed, rules)
+        start = time.perf_counter()
+        money, _ = solve(schedule, cents(rules.starting_money), world_map=world_map)
+        elapsed = time.perf_counter() - start
+        budget *= args.scale
+        flag = ""
+        if elapsed > budget:
+            flag = "  OVER BUDGET"
+            over.append(name)
+        print(f"{name:36} {elapsed:7.2f} s (budget {budget:5.1f} s)  ${money / 100:,.2f}{flag}")
+    if over:
+        print(f"\n{len(over)} world(s) over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
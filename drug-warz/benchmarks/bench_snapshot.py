@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core import Game, Rules, POLICIES  # noqa: E402
+from world_map import WorldMap  # noqa: E402
+import snapshot  # noqa: E402
+
+# Save and restore times for snapshots (snapshot.py): one game in a big
+# generated world, then a batch of paused simulated games. "Open" maps the
+# file and reads the table of arrays; "restore" builds playable Games from it.
+
+
+def best_of(repeat, function):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(label, path, games, repeat, policy):
+    save_time, _ = best_of(repeat, lambda: snapshot.save_games(path, games))
+    open_time, _ = best_of(repeat, lambda: snapshot.Snapshot(path).close())
+
+    def read_money():
+        with snapshot.Snapshot(path) as opened:
+            return float(opened["games/money"].sum())
+    money_time, _ = best_of(repeat, read_money)
+    restore_time, restored = best_of(repeat, lambda: snapshot.load_games(path, policy))
+    assert [game.player.money for game in restored] == [game.player.money for game in games]
+    print(f"{label}: {os.path.getsize(path) / 1e6:.1f} MB")
+    print(f"  Save:           {save_time * 1000:9.1f} ms")
+    print(f"  Open:           {open_time * 1000:9.2f} ms")
+    print(f"  Total money:    {money_time * 1000:9.2f} ms (straight from the mapped file)")
+    print(f"  Restore:        {restore_time * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot save and restore benchmark.")
+    parser.add_argument("--towns", type=int, default=10000, help="rounded down to a square grid")
+    parser.add_argument("--games", type=int, default=1000, help="paused games in the batch snapshot")
+    parser.add_argument("--days", type=int, default=20, help="days played before saving")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    policy = POLICIES["greedy"]()
+    side = int(args.towns ** 0.5)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "game.dws")
+        world = Rules(world_map=WorldMap.grid(side, side, seed=0))
+        game = Game(policy, world, seed=0)
+        game.start(days=args.days)
+        report(f"One game, {world.world_map.town_count:,} towns", path, [game], args.repeat, policy)
+
+        rules = Rules()
+        games = [Game(policy, rules, seed) for seed in range(args.games)]
+        for game in games:
+            game.start(days=args.days)
+        report(f"{args.games:,} games, {len(rules.town_names)} towns each", path, games, args.repeat, policy)
+
+
+if __name__ == "__main__":
+    main()
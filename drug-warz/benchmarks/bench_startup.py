@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Time from process start to the first game window, and to the background
+# being drawn, for the tkinter front end with a cold and a warm image cache.
+# Dialogs are answered by the script, so only the game's own work is timed.
+# The game runs in a scratch directory with a copy of images/, so nothing it
+# writes lands in the real leaderboard, journals or saves. Needs a display and
+# Pillow.
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = r"""
+import time
+start = time.perf_counter()
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from tkinter import simpledialog, messagebox
+simpledialog.askstring = lambda title, prompt, **kw: {"Name": "bench", "Duration": "45 days"}.get(title)
+messagebox.showinfo = lambda *args, **kw: None
+import drug_warz_2
+game = drug_warz_2.Game()
+game.root.update()
+first_window = time.perf_counter() - start
+while game.bg_img is None and game.background_loader.error is None and time.perf_counter() - start < 30:
+    game.root.update()
+    time.sleep(0.001)
+background = time.perf_counter() - start
+game.root.destroy()
+print(json.dumps({"first_window": first_window, "background": background}))
+"""
+
+
+def launch(cache, scratch):
+    env = dict(os.environ, XDG_CACHE_HOME=cache)
+    output = subprocess.run([sys.executable, "-c", CHILD, os.path.abspath(GAME_DIR)], cwd=scratch, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of the tkinter front end.")
+    parser.add_argument("--runs", type=int, default=5, help="warm-cache launches to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache, tempfile.TemporaryDirectory() as scratch:
+        shutil.copytree(os.path.join(GAME_DIR, "images"), os.path.join(scratch, "images"))
+        cold = launch(cache, scratch)
+        warm = [launch(cache, scratch) for _ in range(args.runs)]
+    print(f"Cold cache: first window {1000 * cold['first_window']:7.1f} ms, background {1000 * cold['background']:7.1f} ms")
+    best = min(warm, key=lambda run: run["first_window"])
+    print(f"Warm cache: first window {1000 * best['first_window']:7.1f} ms, background {1000 * best['background']:7.1f} ms "
+          f"(best of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from array import array
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, GAME_DIR)
+
+import core  # noqa: E402
+import drug_warz  # noqa: E402
+import drug_warz_2  # noqa: E402
+import encounters  # noqa: E402
+import journal  # noqa: E402
+import leaderboard  # noqa: E402
+from prices import PriceTable  # noqa: E402
+from streams import Stream  # noqa: E402
+
+# Benchmark suite for the hot paths of the terminal (drug_warz) and tkinter
+# (drug_warz_2) model classes, plus complete scripted 90-day games. Results
+# are saved as JSON; pass --compare with an earlier file to flag regressions.
+#
+#   python benchmarks/suite.py
+#   python benchmarks/suite.py --compare benchmarks/results/before.json
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PRODUCT_NAMES = core.PRODUCT_NAMES
+TOWN_NAMES = core.TOWN_NAMES
+
+
+class NullJournal(journal.Journal):
+    # Keeps the journal calls in the measured code without touching the disk
+    def __init__(self):
+        self.path = os.devnull
+        self.file = open(os.devnull, "ab")
+        self.buffer = bytearray()
+        self.pack = journal.RECORD.pack
+
+    @classmethod
+    def for_session(cls, user_name, town_names=(), product_names=(), directory=None):
+        return cls()
+
+
+def silence_dialogs():
+    # The tkinter Game shows messageboxes from handle_failure; time the model, not Tk
+    for name in ("showinfo", "showerror", "showwarning"):
+        setattr(drug_warz_2.messagebox, name, lambda *args, **kw: None)
+
+
+def make_table():
+    rng = Stream.for_subsystem(0, "market")
+    base_prices = [rng.randint(5, 50) * 100 for _ in PRODUCT_NAMES]
+    return PriceTable(TOWN_NAMES, PRODUCT_NAMES, base_prices, rng)
+
+
+def make_towns(module):
+    return make_table().towns(module.Town)
+
+
+def table_update_prices():
+    # A day of prices for every town, as both front ends and core draw them
+    return make_table().update_prices
+
+
+def model_cases(label, module):
+    cases = {}
+
+    def town_display_products():
+        town = make_towns(module)[0]
+        if module is drug_warz:
+            def display():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    town.display_products()
+            return display
+        return town.display_products
+    cases[f"{label}.Town.display_products"] = town_display_products
+
+    def player_buy_sell():
+        # One buy and the matching sell, so the player's state stays the same
+        product = make_towns(module)[0].products[0]
+        player = module.Player(PRODUCT_NAMES)
+        sink = io.StringIO()
+
+        def trade():
+            with contextlib.redirect_stdout(sink):
+                player.buy_product(product, 10)
+                player.sell_product(product, 10)
+            sink.seek(0)
+            sink.truncate()
+        return trade
+    cases[f"{label}.Player.buy_product+sell_product"] = player_buy_sell
+
+    def game_handle_failure():
+        game = module.Game.__new__(module.Game)
+        game.player = module.Player(PRODUCT_NAMES)
+        game.duration = game.days_left = 90
+        game.encounter_table = encounters.EncounterTable()
+        game.journal = NullJournal()
+        if module is drug_warz_2:
+            game.say = lambda text, color="black": None  # As in silence_dialogs: the panel is Tk
+        inventory = array('q', [1000]) * len(PRODUCT_NAMES)
+        sink = io.StringIO()
+
+        def fail():
+            game.player.money = 1000000
+            game.player.inventory = array('q', inventory)
+            with contextlib.redirect_stdout(sink):
+                game.handle_failure()
+            sink.seek(0)
+            sink.truncate()
+        return fail
+    cases[f"{label}.Game.handle_failure"] = game_handle_failure
+    return cases
+
+
+def terminal_game():
+    # A complete 90-day terminal game with scripted answers at every prompt
+    rng = random.Random(0)
+    drug_warz.Journal = NullJournal
+    drug_warz.Leaderboard = lambda: leaderboard.Leaderboard(":memory:")
+    drug_warz.new_seed = lambda: 0  # The same world every run
+
+    def answer(prompt=""):
+        if "Enter your name" in prompt:
+            return "bench"
+        if "number of the choice" in prompt:
+            return "3"
+        if "travel, buy" in prompt:
+            return rng.choice(["travel", "buy", "sell"])
+        if "fight, run" in prompt:
+            return rng.choice(["fight", "run"])
+        if "town" in prompt:
+            return str(rng.randrange(len(TOWN_NAMES)))
+        if "product number" in prompt:
+            return str(rng.randint(1, len(PRODUCT_NAMES)))
+        return str(rng.randint(1, 50))
+
+    def play():
+        sink = io.StringIO()
+        real_input = builtins.input
+        builtins.input = answer
+        try:
+            with contextlib.redirect_stdout(sink):
+                game = drug_warz.Game()
+                game.start()
+        finally:
+            builtins.input = real_input
+    return play
+
+
+def core_game():
+    # A complete 90-day headless game played by the greedy policy
+    rules = core.Rules(duration=90)
+    policy = core.GreedyPolicy()
+    seeds = iter(range(10 ** 9))
+    return lambda: core.Game(policy, rules, next(seeds)).start()
+
+
+def all_cases():
+    cases = {}
+    cases.update(model_cases("terminal", drug_warz))
+    cases.update(model_cases("tkinter", drug_warz_2))
+    cases["PriceTable.update_prices"] = table_update_prices
+    cases["terminal.Game.start(90 days)"] = terminal_game
+    cases["core.Game.start(90 days)"] = core_game
+    return cases
+
+
+def time_case(func, repeat, min_time):
+    # Grow the loop count until one run takes min_time, then keep the best of repeat runs
+    timer = time.perf_counter
+    number = 1
+    while True:
+        start = timer()
+        for _ in range(number):
+            func()
+        elapsed = timer() - start
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+    runs = []
+    for _ in range(repeat):
+        start = timer()
+        for _ in range(number):
+            func()
+        runs.append((timer() - start) / number)
+    return {"best_ns": min(runs) * 1e9, "median_ns": statistics.median(runs) * 1e9, "number": number, "repeat": repeat}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=GAME_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\n{'benchmark':45} {'before':>12} {'after':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["best_ns"]
+        after = result["best_ns"]
+        change = (after - before) / before
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:45} {format_ns(before):>12} {format_ns(after):>12} {change:+8.1%}{flag}")
+    return regressions
+
+
+def format_ns(ns):
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game model hot paths.")
+    parser.add_argument("--output", help="where to save the JSON results (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timed run")
+    args = parser.parse_args()
+
+    silence_dialogs()
+    results = {}
+    for name, setup in all_cases().items():
+        if args.filter not in name:
+            continue
+        random.seed(0)
+        func = setup()
+        results[name] = time_case(func, args.repeat, args.min_time)
+        print(f"{name:45} {format_ns(results[name]['best_ns']):>12}")
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
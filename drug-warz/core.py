@@ -0,0 +1,365 @@
+import operator
+from array import array
+from encounters import EncounterTable
+from prices import PriceTable
+from streams import Stream, new_seed
+from world_map import WorldMap
+
+# Headless game rules shared by the simulators. Nothing in here reads input or
+# prints, so a policy object can play complete games without a human.
+#
+# Money and prices are whole cents, so they add up exactly however long a game
+# runs. Rules take dollars, as they are typed on the command line.
+
+PRODUCT_NAMES = ['Weed', 'Heroin', 'XTC', 'Acid', 'Cocaine', 'Fentynal', 'Xanax', 'Meth']
+TOWN_NAMES = ["Atlanta", "Birmingham", "Miami", "Los Angeles"]
+DURATIONS = [30, 45, 90]
+ENCOUNTER_TYPES = ["police", "gang"]
+
+
+def cents(dollars):
+    return round(dollars * 100)
+
+
+class Rules:
+    def __init__(self, duration=45, starting_money=10000, encounter_chance=0.3,
+                 escape_chance=0.5, loss_fraction=0.1, min_base_price=5, max_base_price=50,
+                 product_names=PRODUCT_NAMES, town_names=TOWN_NAMES, encounters=None, world_map=None):
+        self.duration = duration
+        self.starting_money = starting_money
+        self.encounter_chance = encounter_chance
+        self.escape_chance = escape_chance
+        self.loss_fraction = loss_fraction
+        self.min_base_price = min_base_price
+        self.max_base_price = max_base_price
+        self.product_names = list(product_names)
+        self.town_names = list(world_map.town_names if world_map else town_names)
+        self._world_map = world_map
+        # Travel encounters; the chances above apply to every encounter unless a table is given
+        self.encounters = encounters or EncounterTable.from_rules(self, ENCOUNTER_TYPES)
+
+    @property
+    def world_map(self):
+        # Days between towns; without a map every town is a day from every other
+        if self._world_map is None:
+            self._world_map = WorldMap.complete(self.town_names)
+        return self._world_map
+
+
+class Player:
+    def __init__(self, product_names, starting_money=1000000):
+        self.money = starting_money
+        self.product_names = product_names
+        self.inventory = array('q', [0]) * len(product_names)  # Units held, indexed by product id
+
+    def buy_product(self, product, quantity):
+        total_cost = product.current_price * quantity
+        if quantity <= 0 or total_cost > self.money:
+            return False
+        self.money -= total_cost
+        self.inventory[product.id] += quantity
+        return True
+
+    def sell_product(self, product, quantity):
+        if quantity <= 0 or self.inventory[product.id] < quantity:
+            return False
+        self.money += product.current_price * quantity
+        self.inventory[product.id] -= quantity
+        return True
+
+    def net_worth(self, products):
+        return self.money + sum(map(operator.mul, self.inventory, [product.current_price for product in products]))
+
+    def lose(self, fraction):
+        # Takes the fraction of money and of every product at once and returns what was lost
+        loss_money = round(self.money * fraction)
+        self.money -= loss_money
+        lost = array('q', [int(quantity * fraction) for quantity in self.inventory])
+        self.inventory = array('q', map(operator.sub, self.inventory, lost))
+        return loss_money, lost
+
+    def holdings(self):
+        return [(name, quantity) for name, quantity in zip(self.product_names, self.inventory) if quantity]
+
+
+class GameView:
+    # What a policy sees of a Game: numbers and tuples it can't change. Every
+    # game has one view, and it reads the game's current state on each access.
+    __slots__ = ("_game", "_base_prices")
+
+    def __init__(self, game):
+        self._game = game
+        self._base_prices = tuple(game.price_table.base_prices)  # The same in every town
+
+    @property
+    def day(self):
+        return self._game.day
+
+    @property
+    def days_left(self):
+        return self._game.days_left
+
+    @property
+    def duration(self):
+        return self._game.rules.duration
+
+    @property
+    def money(self):
+        return self._game.player.money
+
+    @property
+    def inventory(self):
+        return tuple(self._game.player.inventory)
+
+    @property
+    def town(self):
+        return self._game.town_index
+
+    @property
+    def town_names(self):
+        return tuple(self._game.rules.town_names)
+
+    @property
+    def product_names(self):
+        return tuple(self._game.rules.product_names)
+
+    @property
+    def prices(self):
+        return self._game.current_town.prices()
+
+    @property
+    def previous_prices(self):
+        return self._game.current_town.previous_prices()
+
+    @property
+    def base_prices(self):
+        return self._base_prices
+
+    @property
+    def encounter_types(self):
+        return tuple(self._game.rules.encounters.types)
+
+    @property
+    def loss_fraction(self):
+        return self._game.rules.encounters.loss_fraction
+
+    def encounter_chance(self, type):
+        # The encounter table is shared by every game on these rules, so the view only reads from it
+        return self._game.rules.encounters.chance(type)
+
+    def escape_chance(self, type, response):
+        return self._game.rules.encounters.escape_chance(type, response)
+
+    @property
+    def rng(self):
+        # The policy's own random numbers (a streams.Stream: random, uniform, randint,
+        # randrange, choice); drawing from them doesn't change the world
+        return self._game.policy_rng
+
+    def travel_days(self, town):
+        # Days to reach town from here, or None if there is no road
+        return self._game.rules.world_map.travel_days(self._game.town_index, town)
+
+    def net_worth(self):
+        return self._game.player.net_worth(self._game.current_town.products)
+
+
+class Policy:
+    # Policies answer the same questions Game.start asks at the keyboard, looking
+    # at the game through a GameView.
+    # choose_action returns ("travel", town_index), ("buy", product_index, quantity),
+    # ("sell", product_index, quantity) or ("quit",).
+    # choose_encounter returns ("fight",), ("run",) or ("bribe", amount).
+    # Money, prices and bribes are in cents.
+
+    def choose_action(self, view):
+        raise NotImplementedError
+
+    def choose_encounter(self, view, type):
+        return ("run",)
+
+
+class RandomPolicy(Policy):
+    def choose_action(self, view):
+        rng = view.rng
+        roll = rng.random()
+        if roll < 0.3:
+            return ("travel", rng.randrange(len(view.town_names)))
+        prices = view.prices
+        index = rng.randrange(len(prices))
+        if roll < 0.65:
+            quantity = int(view.money // prices[index])
+            return ("buy", index, rng.randint(0, quantity) if quantity > 0 else 0)
+        return ("sell", index, view.inventory[index])
+
+    def choose_encounter(self, view, type):
+        return (view.rng.choice(["fight", "run"]),)
+
+
+class GreedyPolicy(Policy):
+    # Buys whatever is cheapest relative to its base price, sells anything
+    # trading above base, and travels when there is nothing to do.
+
+    def choose_action(self, view):
+        prices = view.prices
+        base_prices = view.base_prices
+        last_day = view.days_left == 1
+        for i, held in enumerate(view.inventory):
+            if held and (prices[i] > base_prices[i] or last_day):
+                return ("sell", i, held)
+        if not last_day:
+            best = min(range(len(prices)), key=lambda i: prices[i] / base_prices[i])
+            if prices[best] < base_prices[best]:
+                quantity = int(view.money // prices[best])
+                if quantity > 0:
+                    return ("buy", best, quantity)
+        return ("travel", view.rng.randrange(len(view.town_names)))
+
+
+class BriberPolicy(GreedyPolicy):
+    # Trades like GreedyPolicy but pays off every encounter with a small share of its cash
+    share = 0.02
+
+    def choose_encounter(self, view, type):
+        return ("bribe", int(view.money * self.share))
+
+
+POLICIES = {"random": RandomPolicy, "greedy": GreedyPolicy, "briber": BriberPolicy}
+
+
+class Game:
+    def __init__(self, policy, rules=None, seed=None, journal=None):
+        self.rules = rules or Rules()
+        self.policy = policy
+        self.journal = journal
+        # Prices, encounters and the policy each draw from their own stream, so every
+        # game with the same seed sees the same market whatever its policy does
+        self.seed = new_seed() if seed is None else seed
+        self.market_rng = Stream.for_subsystem(self.seed, "market")
+        self.encounter_rng = Stream.for_subsystem(self.seed, "encounters")
+        self.policy_rng = Stream.for_subsystem(self.seed, "policy")
+        self.days_left = self.rules.duration
+        base_prices = [cents(self.market_rng.randint(self.rules.min_base_price, self.rules.max_base_price))
+                       for _ in self.rules.product_names]
+        # Every town's prices and their last week, in one table; see prices.py
+        self.price_table = PriceTable(self.rules.town_names, self.rules.product_names, base_prices, self.market_rng)
+        self.towns = self.price_table.towns()
+        self.player = Player(self.rules.product_names, cents(self.rules.starting_money))
+        self.town_index = 0
+        self.current_town = self.towns[0]
+        self.view = GameView(self)
+        self.encounters = 0
+        self.failures = 0
+        self.quit = False
+
+    @property
+    def day(self):
+        return self.rules.duration - self.days_left
+
+    def start(self, days=None):
+        # Plays to the end, or only the next few days so the game can be saved and picked up later
+        journal = self.journal
+        if journal and self.days_left == self.rules.duration:
+            journal.start(self.rules.duration, self.player.money)
+        stop_at = self.days_left - days if days else 0
+        while self.days_left > max(stop_at, 0):
+            if self.quit:
+                break
+            self.price_table.update_prices()
+            if journal:
+                journal.prices(self.day, self.town_index, self.current_town.prices())
+            action = self.policy.choose_action(self.view)
+            self.process_action(action)
+            if self.quit:
+                break
+            self.days_left -= 1
+            if journal:
+                journal.end_day(self.day - 1, self.days_left)
+        return self.player.money
+
+    def process_action(self, action):
+        kind = action[0]
+        if self.journal:
+            self.journal.action(self.day, kind, action[1] if len(action) > 1 else 0)
+        if kind == "travel":
+            self.travel(action[1])
+        elif kind == "buy":
+            self.buy(action[1], action[2])
+        elif kind == "sell":
+            self.sell(action[1], action[2])
+        elif kind == "quit":
+            self.quit = True
+            if self.journal:
+                self.journal.quit(self.day)
+
+    def travel(self, choice):
+        for type in self.rules.encounters.types:
+            if self.random_encounter(type):
+                return False
+        if 0 <= choice < len(self.towns):
+            days = self.rules.world_map.travel_days(self.town_index, choice)
+            if days is None or days > self.days_left:
+                return False
+            if self.journal:
+                self.journal.arrive(self.day, choice)  # Stamped with the day the trip starts, like its rolls
+            self.town_index = choice
+            self.current_town = self.towns[choice]
+            if days > 1:
+                self.days_left -= days - 1  # The action's own day covers the first day on the road
+            return True
+        return False
+
+    def roll(self):
+        value = self.encounter_rng.random()
+        if self.journal:
+            self.journal.roll(self.day, value)
+        return value
+
+    def random_encounter(self, type):
+        table = self.rules.encounters
+        if self.roll() >= table.chance(type):
+            return False
+        self.encounters += 1
+        response = self.policy.choose_encounter(self.view, type)
+        if self.journal:
+            self.journal.encounter(self.day, type, response[0], response[1] if len(response) > 1 else 0)
+        if response[0] == "bribe":
+            bribe_amount = response[1]
+            if bribe_amount > self.player.money:
+                self.handle_failure()
+                return True
+            self.player.money -= bribe_amount
+            if self.journal:
+                self.journal.bribe(self.day, bribe_amount)
+        escape_chance = table.escape_chance(type, response[0])
+        if escape_chance and self.roll() < escape_chance:
+            return False
+        self.handle_failure()
+        return True
+
+    def handle_failure(self):
+        self.failures += 1
+        fraction = self.rules.encounters.loss_fraction
+        if self.journal:
+            self.journal.caught(self.day, fraction)
+        self.player.lose(fraction)
+
+    def buy(self, product_number, quantity):
+        products = self.current_town.products
+        if 0 <= product_number < len(products):
+            product = products[product_number]
+            if self.player.buy_product(product, quantity):
+                if self.journal:
+                    self.journal.buy(self.day, product_number, quantity, product.current_price)
+                return True
+        return False
+
+    def sell(self, product_number, quantity):
+        products = self.current_town.products
+        if 0 <= product_number < len(products):
+            product = products[product_number]
+            if self.player.sell_product(product, quantity):
+                if self.journal:
+                    self.journal.sell(self.day, product_number, quantity, product.current_price)
+                return True
+        return False
@@ -1,25 +1,21 @@
-import random
+import builtins
+import operator
+import os
+import sqlite3
+import sys
+from array import array
+from encounters import EncounterTable
+from instrument import instrument_from_env
+from journal import Journal
+from leaderboard import Leaderboard
+from prices import PriceTable, ProductPrices, TownPrices
+from snapshot import save_path, save_session, restore_session
+from streams import Stream, new_seed
+from world_map import WorldMap, DEFAULT_MAP
 
-class Product:
-    def __init__(self, name, base_price):
-        self.name = name
-        self.base_price = base_price
-        self.current_price = self.get_price()
-        self.previous_price = self.current_price
-
-    def get_price(self):
-        fluctuation = random.uniform(0.8, 1.2)
-        return round(self.base_price * fluctuation, 2)
-
-    def update_price(self):
-        self.previous_price = self.current_price
-        self.current_price = self.get_price()
-
-    def price_change_percentage(self):
-        if self.previous_price == 0:
-            return 0
-        change = ((self.current_price - self.previous_price) / self.previous_price) * 100
-        return round(change, 2)
+class Product(ProductPrices):
+    # A product's price in one town, read from the game's PriceTable (see prices.py)
+    __slots__ = ()
 
     def display_price_info(self, index):
         change_percentage = self.price_change_percentage()
@@ -30,16 +26,11 @@ class Product:
         else:
             color_code = "\033[0m"  # Default color for no change
         reset_code = "\033[0m"
-        print(f"{index}. {self.name}: {color_code}${self.current_price} ({change_percentage}% change from yesterday){reset_code}")
-
-class Town:
-    def __init__(self, name, products):
-        self.name = name
-        self.products = products
+        print(f"{index}. {self.name}: {color_code}${self.current_price / 100:.2f} ({change_percentage}% change from yesterday){reset_code}  {self.summary()}")
 
-    def update_prices(self):
-        for product in self.products:
-            product.update_price()
+class Town(TownPrices):
+    # Without __slots__, so instrument.py can wrap display_products on each town
+    product_class = Product
 
     def display_products(self):
         print(f"Products in {self.name}:")
@@ -48,49 +39,93 @@ class Town:
         print()
 
 class Player:
-    def __init__(self, starting_money=10000):
-        self.money = starting_money
-        self.inventory = {product: 0 for product in '12345678'}
+    def __init__(self, product_names, starting_money=1000000):
+        self.money = starting_money  # In cents, so it never drifts
+        self.product_names = product_names
+        self.inventory = array('q', [0]) * len(product_names)  # Units held, indexed by product id
 
     def buy_product(self, product, quantity):
         total_cost = product.current_price * quantity
-        if total_cost > self.money:
+        if quantity <= 0:
+            print("Enter a quantity above zero.")
+        elif total_cost > self.money:
             print("Not enough money.")
         else:
             self.money -= total_cost
-            if product.name in self.inventory:
-                self.inventory[product.name] += quantity
-            else:
-                self.inventory[product.name] = quantity
+            self.inventory[product.id] += quantity
             print(f"Bought {quantity} of {product.name}")
 
     def sell_product(self, product, quantity):
-        if product.name not in self.inventory or self.inventory[product.name] < quantity:
+        if quantity <= 0:
+            print("Enter a quantity above zero.")
+        elif self.inventory[product.id] < quantity:
             print("Not enough inventory.")
         else:
             self.money += product.current_price * quantity
-            self.inventory[product.name] -= quantity
+            self.inventory[product.id] -= quantity
             print(f"Sold {quantity} of {product.name}")
 
+    def net_worth(self, products):
+        return self.money + sum(map(operator.mul, self.inventory, [product.current_price for product in products]))
+
+    def lose(self, fraction):
+        # Takes the fraction of money and of every product at once and returns what was lost
+        loss_money = round(self.money * fraction)
+        self.money -= loss_money
+        lost = array('q', [int(quantity * fraction) for quantity in self.inventory])
+        self.inventory = array('q', map(operator.sub, self.inventory, lost))
+        return loss_money, lost
+
+    def describe_loss(self, loss_money, lost):
+        items = [f"{quantity} {name}" for name, quantity in zip(self.product_names, lost) if quantity]
+        if items:
+            return f"You lost ${loss_money / 100:.2f} and {', '.join(items)}."
+        return f"You lost ${loss_money / 100:.2f}."
+
     def display_inventory(self):
         print("Current inventory:")
-        for product, quantity in self.inventory.items():
-            print(f"{product}: {quantity}")
-        print(f"Current money: ${self.money}")
+        for i, (name, quantity) in enumerate(zip(self.product_names, self.inventory)):
+            print(f"{i + 1}. {name}: {quantity}")
+        print(f"Current money: ${self.money / 100:.2f}")
         print()
 
 class Game:
-    def __init__(self):
+    def __init__(self, map_path=DEFAULT_MAP):
         self.user_name = input("Enter your name: ")
-        self.days_left = self.select_game_duration()
-        print(f"Welcome {self.user_name}! Make as much money as you can in the given time to win! The world is yours!")
-        # Define custom product names
-        product_names = ['Weed', 'Heroin', 'XTC', 'Acid', 'Cocaine', 'Fentynal', 'Xanax', 'Meth']
-        # Initialize products with custom names and random base prices
-        self.products = [Product(name, random.randint(5, 50)) for name in product_names]
-        self.towns = [Town(name, self.products) for name in ["Atlanta", "Birmingham", "Miami", "Los Angeles"]]
-        self.player = Player()
-        self.current_town = self.towns[0]
+        self.save_path = save_path(self.user_name)
+        self.resumed = False
+        if os.path.exists(self.save_path) and input("Resume your saved game? (y/n): ").lower().startswith("y"):
+            # Picks up where the save left off: same world, prices, random numbers and journal
+            self.journal = Journal(restore_session(self.save_path, self, Town, Player))
+            self.resumed = True
+            print(f"Welcome back {self.user_name}! You have {self.days_left} days left.")
+        else:
+            self.days_left = self.select_game_duration()
+            self.duration = self.days_left
+            print(f"Welcome {self.user_name}! Make as much money as you can in the given time to win! The world is yours!")
+            # Define custom product names
+            product_names = ['Weed', 'Heroin', 'XTC', 'Acid', 'Cocaine', 'Fentynal', 'Xanax', 'Meth']
+            # Every random number in the game comes from streams of one seed, see streams.py
+            self.seed = new_seed()
+            self.market_rng = Stream.for_subsystem(self.seed, "market")
+            self.encounter_rng = Stream.for_subsystem(self.seed, "encounters")
+            # Initialize products with custom names and random base prices
+            base_prices = [self.market_rng.randint(5, 50) * 100 for _ in product_names]
+            self.world_map = WorldMap.load(map_path)  # Towns and the days between them, see world_map.py
+            # Every town keeps its own prices around the shared base prices, all in one table
+            self.price_table = PriceTable(self.world_map.town_names, product_names, base_prices, self.market_rng)
+            self.towns = self.price_table.towns(Town)
+            self.player = Player(product_names)
+            self.town_index = 0
+            self.current_town = self.towns[0]
+            self.journal = Journal.for_session(self.user_name, self.world_map.town_names, product_names)
+        self.encounter_table = EncounterTable()  # Encounter chances and losses, see encounters.py
+        # Off unless DOPE_WARZ_PROFILE is set; see instrument.py
+        self.instruments = instrument_from_env(self, waits=[(builtins, "input")])
+
+    @property
+    def day(self):
+        return self.duration - self.days_left
 
     def select_game_duration(self):
         print("Select the game duration:")
@@ -110,67 +145,133 @@ class Game:
 
     def start(self):
         print("Welcome to the game!")
+        if not self.resumed:
+            self.journal.start(self.duration, self.player.money)
         while self.days_left > 0:
             print(f"Current town: {self.current_town.name}")
             print(f"Days left: {self.days_left}")
-            self.current_town.update_prices()
+            if self.resumed:
+                self.resumed = False  # The save was made after today's prices came in
+            else:
+                self.price_table.update_prices()
+                self.journal.prices(self.day, self.town_index, self.current_town.prices())
             self.current_town.display_products()
             self.player.display_inventory()
-            action = input("Choose an action: travel, buy, sell, quit: ").lower()
+            action = input("Choose an action: travel, buy, sell, save, quit: ").lower()
+            self.journal.action(self.day, action)
             if action == "travel":
                 self.travel()
             elif action == "buy":
                 self.buy()
             elif action == "sell":
                 self.sell()
+            elif action == "save":
+                self.save()
+                return
             elif action == "quit":
+                self.journal.quit(self.day)
                 break
             else:
                 print("Invalid action. Try again.")
             self.days_left -= 1  # Decrease the number of days left
-        print(f"Game over! {self.user_name}, you ended with ${self.player.money:.2f}.")
+            self.journal.end_day(self.day - 1, self.days_left)
+        self.journal.close()
+        if os.path.exists(self.save_path):
+            os.remove(self.save_path)  # The game is over, so there is nothing to resume
+        net_worth = self.player.net_worth(self.current_town.products)
+        print(f"Game over! {self.user_name}, you ended with ${self.player.money / 100:.2f} "
+              f"(net worth ${net_worth / 100:.2f} at {self.current_town.name} prices).")
+        print(self.record_score())
+        if self.instruments:
+            self.instruments.finish()
+
+    def record_score(self):
+        # Adds the final money to the local leaderboard and says where it placed
+        try:
+            with Leaderboard() as leaderboard:
+                rank = leaderboard.add(self.user_name, self.duration, self.player.money)
+                return leaderboard.describe_rank(rank, self.duration)
+        except sqlite3.Error as error:
+            return f"Could not record your score: {error}"
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
+        save_session(self.save_path, self)
+        self.journal.close()
+        print(f"Game saved. Enter the name {self.user_name} next time to carry on.")
+        if self.instruments:
+            self.instruments.finish()
 
     def travel(self):
-        if self.random_encounter("police") or self.random_encounter("gang"):
-            return
+        for type in self.encounter_table.types:
+            if self.random_encounter(type):
+                return
         
         print("Choose a town to travel to:")
         for i, town in enumerate(self.towns):
-            print(f"{i}: {town.name}")
+            print(f"{i}: {town.name}{self.trip_length(i)}")
         choice = int(input("Enter the number of the town: "))
         if 0 <= choice < len(self.towns):
+            days = self.world_map.travel_days(self.town_index, choice)
+            if days is None or days > self.days_left:
+                print(f"You can't reach {self.towns[choice].name} in the days you have left.")
+                return
+            self.journal.arrive(self.day, choice)  # Stamped with the day the trip starts, like its rolls
+            self.town_index = choice
             self.current_town = self.towns[choice]
+            if days > 1:
+                self.days_left -= days - 1  # The action's own day covers the first day on the road
             print(f"Traveled to {self.current_town.name}")
         else:
             print("Invalid choice.")
 
+    def trip_length(self, town):
+        if town == self.town_index:
+            return " (you are here)"
+        days = self.world_map.travel_days(self.town_index, town)
+        if days is None:
+            return " (no road)"
+        return f" ({days} day{'s' if days != 1 else ''})"
+
+    def roll(self):
+        value = self.encounter_rng.random()
+        self.journal.roll(self.day, value)  # Journal every draw so the game can be replayed
+        return value
+
     def random_encounter(self, type):
-        encounter_chance = random.random()
-        if encounter_chance < 0.3:  # 30% chance of an encounter
+        encounter_chance = self.roll()
+        if encounter_chance < self.encounter_table.chance(type):  # 30% chance of an encounter by default
             print(f"You have encountered a {type}!")
             action = input("Choose an action: fight, run, bribe: ").lower()
+            if action != "bribe":
+                self.journal.encounter(self.day, type, action)
             if action == "fight":
-                if random.random() < 0.5:
+                if self.roll() < self.encounter_table.escape_chance(type, "fight"):
                     print(f"You successfully fought off the {type}!")
                 else:
                     print(f"You were caught by the {type}!")
                     self.handle_failure()
                     return True
             elif action == "run":
-                if random.random() < 0.5:
+                if self.roll() < self.encounter_table.escape_chance(type, "run"):
                     print(f"You successfully ran away from the {type}!")
                 else:
                     print(f"You were caught by the {type}!")
                     self.handle_failure()
                     return True
             elif action == "bribe":
-                bribe_amount = int(input("Enter the amount to bribe: "))
+                bribe_amount = int(input("Enter the amount to bribe: ")) * 100
+                while bribe_amount <= 0:  # A negative bribe would pay the player
+                    print("Enter a bribe above zero.")
+                    bribe_amount = int(input("Enter the amount to bribe: ")) * 100
+                self.journal.encounter(self.day, type, action, bribe_amount)
                 if bribe_amount > self.player.money:
                     print("Not enough money to bribe!")
                     self.handle_failure()
                     return True
                 self.player.money -= bribe_amount
-                if random.random() < 0.5:
+                self.journal.bribe(self.day, bribe_amount)
+                if self.roll() < self.encounter_table.escape_chance(type, "bribe"):
                     print(f"The {type} accepted your bribe!")
                 else:
                     print(f"The {type} rejected your bribe!")
@@ -183,14 +284,10 @@ class Game:
         return False
 
     def handle_failure(self):
-        print("You lost some money and inventory.")
-        loss_money = self.player.money * 0.1
-        self.player.money -= loss_money
-        print(f"You lost ${loss_money:.2f}.")
-        for product in self.player.inventory:
-            loss_quantity = self.player.inventory[product] * 0.1
-            self.player.inventory[product] -= int(loss_quantity)
-            print(f"You lost {int(loss_quantity)} of {product}.")
+        fraction = self.encounter_table.loss_fraction
+        self.journal.caught(self.day, fraction)
+        loss_money, lost = self.player.lose(fraction)
+        print(self.player.describe_loss(loss_money, lost))
 
     def buy(self):
         self.current_town.display_products()
@@ -198,7 +295,10 @@ class Game:
         quantity = int(input("Enter the quantity to buy: "))
         if 0 <= product_number < len(self.current_town.products):
             product = self.current_town.products[product_number]
+            money_before = self.player.money
             self.player.buy_product(product, quantity)
+            if self.player.money != money_before:
+                self.journal.buy(self.day, product_number, quantity, product.current_price)
         else:
             print("Product not found.")
 
@@ -208,10 +308,13 @@ class Game:
         quantity = int(input("Enter the quantity to sell: "))
         if 0 <= product_number < len(self.current_town.products):
             product = self.current_town.products[product_number]
+            money_before = self.player.money
             self.player.sell_product(product, quantity)
+            if self.player.money != money_before:
+                self.journal.sell(self.day, product_number, quantity, product.current_price)
         else:
             print("Product not found.")
 
 if __name__ == "__main__":
-    game = Game()
+    game = Game(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MAP)
     game.start()
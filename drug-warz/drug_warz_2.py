@@ -1,28 +1,30 @@
-import random
+import operator
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from collections import deque
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-from PIL import Image, ImageTk  # Pillow library for image handling
+from image_cache import BackgroundLoader
+from encounters import EncounterTable
+from instrument import instrument_from_env
+from journal import Journal
+from leaderboard import Leaderboard
+from prices import PriceTable, ProductPrices, TownPrices
+from snapshot import save_path, save_session, restore_session
+from streams import Stream, new_seed
+from worker import Worker
+from world_map import WorldMap, DEFAULT_MAP
 
-class Product:
-    def __init__(self, name, base_price):
-        self.name = name
-        self.base_price = base_price
-        self.current_price = self.get_price()
-        self.previous_price = self.current_price
+FRAME_MS = 16  # Tick about 60 times a second
+LATE_FRAME = 1.5 / 60  # A tick this far behind has missed a 60 fps frame
+ACTION_PROMPT = "Choose an action: travel, buy, sell, save, quit"
 
-    def get_price(self):
-        fluctuation = random.uniform(0.8, 1.2)
-        return round(self.base_price * fluctuation, 2)
-
-    def update_price(self):
-        self.previous_price = self.current_price
-        self.current_price = self.get_price()
-
-    def price_change_percentage(self):
-        if self.previous_price == 0:
-            return 0
-        change = ((self.current_price - self.previous_price) / self.previous_price) * 100
-        return round(change, 2)
+class Product(ProductPrices):
+    # A product's price in one town, read from the game's PriceTable (see prices.py)
+    __slots__ = ()
 
     def display_price_info(self, index):
         change_percentage = self.price_change_percentage()
@@ -32,16 +34,11 @@ class Product:
             color_code = "red"  # Red for price decrease
         else:
             color_code = "black"  # Default color for no change
-        return f"{index}. {self.name}: ${self.current_price} ({change_percentage}% change from yesterday)", color_code
+        return f"{index}. {self.name}: ${self.current_price / 100:.2f} ({change_percentage}% change from yesterday)  {self.summary()}", color_code
 
-class Town:
-    def __init__(self, name, products):
-        self.name = name
-        self.products = products
-
-    def update_prices(self):
-        for product in self.products:
-            product.update_price()
+class Town(TownPrices):
+    # Without __slots__, so instrument.py can wrap display_products on each town
+    product_class = Product
 
     def display_products(self):
         product_info = []
@@ -51,59 +48,109 @@ class Town:
         return product_info
 
 class Player:
-    def __init__(self, starting_money=10000):
-        self.money = starting_money
-        self.inventory = {}
+    def __init__(self, product_names, starting_money=1000000):
+        self.money = starting_money  # In cents, so it never drifts
+        self.product_names = product_names
+        self.inventory = array('q', [0]) * len(product_names)  # Units held, indexed by product id
 
     def buy_product(self, product, quantity):
         total_cost = product.current_price * quantity
-        if total_cost > self.money:
+        if quantity <= 0:
+            return "Enter a quantity above zero."
+        elif total_cost > self.money:
             return "Not enough money."
         else:
             self.money -= total_cost
-            if product.name in self.inventory:
-                self.inventory[product.name] += quantity
-            else:
-                self.inventory[product.name] = quantity
+            self.inventory[product.id] += quantity
             return f"Bought {quantity} of {product.name}"
 
     def sell_product(self, product, quantity):
-        if product.name not in self.inventory or self.inventory[product.name] < quantity:
+        if quantity <= 0:
+            return "Enter a quantity above zero."
+        elif self.inventory[product.id] < quantity:
             return "Not enough inventory."
         else:
             self.money += product.current_price * quantity
-            self.inventory[product.name] -= quantity
-            if self.inventory[product.name] == 0:
-                del self.inventory[product.name]
+            self.inventory[product.id] -= quantity
             return f"Sold {quantity} of {product.name}"
 
+    def net_worth(self, products):
+        return self.money + sum(map(operator.mul, self.inventory, [product.current_price for product in products]))
+
+    def lose(self, fraction):
+        # Takes the fraction of money and of every product at once and returns what was lost
+        loss_money = round(self.money * fraction)
+        self.money -= loss_money
+        lost = array('q', [int(quantity * fraction) for quantity in self.inventory])
+        self.inventory = array('q', map(operator.sub, self.inventory, lost))
+        return loss_money, lost
+
+    def describe_loss(self, loss_money, lost):
+        items = [f"{quantity} {name}" for name, quantity in zip(self.product_names, lost) if quantity]
+        if items:
+            return f"You lost ${loss_money / 100:.2f} and {', '.join(items)}."
+        return f"You lost ${loss_money / 100:.2f}."
+
     def display_inventory(self):
         inventory_info = ["Current inventory:"]
-        for product, quantity in self.inventory.items():
-            inventory_info.append(f"{product}: {quantity}")
-        inventory_info.append(f"Current money: ${self.money:.2f}")
+        for name, quantity in zip(self.product_names, self.inventory):
+            if quantity:
+                inventory_info.append(f"{name}: {quantity}")
+        inventory_info.append(f"Current money: ${self.money / 100:.2f}")
         return inventory_info
 
 class Game:
-    def __init__(self):
+    def __init__(self, map_path=DEFAULT_MAP):
         self.root = tk.Tk()
         self.root.state('zoomed')  # Open the window maximized
         self.root.withdraw()
+        # Scale the background on a worker thread while the dialogs are up
+        self.background_loader = BackgroundLoader('images/background.png', (self.root.winfo_screenwidth(), self.root.winfo_screenheight()))
         self.user_name = simpledialog.askstring("Name", "Enter your name:")
-        self.days_left = self.select_game_duration()
-        messagebox.showinfo("Welcome", f"Welcome {self.user_name}! Make as much money as you can in the given time to win! The world is yours!")
-        # Define custom product names
-        product_names = ['Weed', 'Heroin', 'XTC', 'Acid', 'Cocaine', 'Fentynal', 'Xanax', 'Meth']
-        # Initialize products with custom names and random base prices
-        self.products = [Product(name, random.randint(5, 50)) for name in product_names]
-        self.towns = [Town(name, self.products) for name in ["Atlanta", "Birmingham", "Miami", "Los Angeles"]]
-        self.player = Player()
-        self.current_town = self.towns[0]
+        self.save_path = save_path(self.user_name)
+        if os.path.exists(self.save_path) and messagebox.askyesno("Resume", "Resume your saved game?"):
+            # Picks up where the save left off: same world, prices, random numbers and journal
+            self.journal = Journal(restore_session(self.save_path, self, Town, Player))
+            messagebox.showinfo("Welcome", f"Welcome back {self.user_name}! You have {self.days_left} days left.")
+        else:
+            self.days_left = self.select_game_duration()
+            self.duration = self.days_left
+            messagebox.showinfo("Welcome", f"Welcome {self.user_name}! Make as much money as you can in the given time to win! The world is yours!")
+            # Define custom product names
+            product_names = ['Weed', 'Heroin', 'XTC', 'Acid', 'Cocaine', 'Fentynal', 'Xanax', 'Meth']
+            # Every random number in the game comes from streams of one seed, see streams.py
+            self.seed = new_seed()
+            self.market_rng = Stream.for_subsystem(self.seed, "market")
+            self.encounter_rng = Stream.for_subsystem(self.seed, "encounters")
+            # Initialize products with custom names and random base prices
+            base_prices = [self.market_rng.randint(5, 50) * 100 for _ in product_names]
+            self.world_map = WorldMap.load(map_path)  # Towns and the days between them, see world_map.py
+            # Every town keeps its own prices around the shared base prices, all in one table
+            self.price_table = PriceTable(self.world_map.town_names, product_names, base_prices, self.market_rng)
+            self.towns = self.price_table.towns(Town)
+            self.player = Player(product_names)
+            self.town_index = 0
+            self.current_town = self.towns[0]
+            self.journal = Journal.for_session(self.user_name, self.world_map.town_names, product_names)
+            self.journal.start(self.duration, self.player.money)
+            self.journal.prices(self.day, self.town_index, self.current_town.prices())
+        self.encounter_table = EncounterTable()  # Encounter chances and losses, see encounters.py
         self.root.deiconify()
         self.root.title("Trading Game")
         self.create_widgets()
+        self.pending = None  # What to do with the next thing the player submits, if not an action
+        self.busy = False
+        self.worker = Worker()
+        self.root.after(FRAME_MS, self.tick)
+        # Off unless DOPE_WARZ_PROFILE is set; see instrument.py
+        self.instruments = instrument_from_env(self, waits=[(simpledialog, "askstring"), (simpledialog, "askinteger"),
+                                                            (messagebox, "askyesno"), (messagebox, "showinfo"), (messagebox, "showerror")])
         self.update_display()
 
+    @property
+    def day(self):
+        return self.duration - self.days_left
+
     def select_game_duration(self):
         durations = {"30 days": 30, "45 days": 45, "90 days": 90}
         duration = simpledialog.askstring("Duration", "Select the game duration (30 days, 45 days, 90 days):")
@@ -113,148 +160,380 @@ class Game:
         self.canvas = tk.Canvas(self.root, width=self.root.winfo_screenwidth(), height=self.root.winfo_screenheight())
         self.canvas.pack(fill="both", expand=True)
         
-        # Load and display background image
-        self.background_image = Image.open('images/background.png')
-        self.background_image = self.background_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-        self.bg_img = ImageTk.PhotoImage(self.background_image)
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.bg_img)
+        # The background is drawn once it is ready, behind everything else
+        self.bg_img = None
+        self.root.after(0, self.show_background)
 
         self.info_label = tk.Label(self.root, text="", justify="left", bg="white")
         self.info_label_window = self.canvas.create_window(10, 10, anchor="nw", window=self.info_label)
 
-        self.action_label = tk.Label(self.root, text="Choose an action: travel, buy, sell, quit", bg="white")
-        self.action_label_window = self.canvas.create_window(10, 500, anchor="nw", window=self.action_label)
+        # Questions are asked in this panel instead of in dialogs, so the window never blocks
+        self.panel = tk.Frame(self.root, bg="white")
+        self.panel_window = self.canvas.create_window(10, 500, anchor="nw", window=self.panel)
 
-        self.action_entry = tk.Entry(self.root)
-        self.action_entry_window = self.canvas.create_window(10, 530, anchor="nw", window=self.action_entry)
-        self.action_entry.bind("<Return>", self.process_action)
+        self.action_label = tk.Label(self.panel, text=ACTION_PROMPT, justify="left", bg="white")
+        self.action_label.pack(anchor="w")
 
-        self.action_button = tk.Button(self.root, text="Submit", command=self.process_action)
-        self.action_button_window = self.canvas.create_window(210, 530, anchor="nw", window=self.action_button)
+        entry_row = tk.Frame(self.panel, bg="white")
+        entry_row.pack(anchor="w", pady=5)
+        self.action_entry = tk.Entry(entry_row)
+        self.action_entry.pack(side="left")
+        self.action_entry.bind("<Return>", self.submit)
+        self.action_entry.focus_set()
 
-    def update_display(self):
-        self.canvas.delete("price_info")  # Clear previous price info
-        info_text = f"Current town: {self.current_town.name}\nDays left: {self.days_left}\n\n"
-        products_info = self.current_town.display_products()
+        self.action_button = tk.Button(entry_row, text="Submit", command=self.submit)
+        self.action_button.pack(side="left", padx=5)
+
+        self.message_label = tk.Label(self.panel, text="", justify="left", bg="white")
+        self.message_label.pack(anchor="w")
+        self.messages = deque(maxlen=5)
+
+        # One label per product row, created once and updated in place every turn
+        self.price_labels = []
         y_offset = 10
-        for info, color in products_info:
-            label = tk.Label(self.root, text=info, fg=color, bg="white")
+        for _ in self.current_town.products:
+            label = tk.Label(self.root, text="", bg="white")
             self.canvas.create_window(10, y_offset, anchor="nw", window=label, tags="price_info")
+            self.price_labels.append(label)
             y_offset += 20
+        self.shown_rows = [None] * len(self.price_labels)
+        self.shown_info = None
+        self.frame_times = []
+        self.frame_intervals = deque(maxlen=3600)  # The last minute of ticks
+        self.frames = 0
+        self.late_frames = 0
+        self.last_tick = None
+
+    def show_background(self):
+        if not self.background_loader.done():
+            self.root.after(15, self.show_background)
+            return
+        if self.background_loader.error:
+            print(f"Could not load background image: {self.background_loader.error}")
+            return
+        self.bg_img = tk.PhotoImage(file=self.background_loader.path)
+        background = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.bg_img)
+        self.canvas.tag_lower(background)
+
+    def tick(self):
+        # Runs about 60 times a second: hands finished background work to the game
+        # and measures how evenly the Tk thread gets to run
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            interval = now - self.last_tick
+            self.frame_intervals.append(interval)
+            self.frames += 1
+            if interval > LATE_FRAME:
+                self.late_frames += 1
+        self.last_tick = now
+        self.worker.deliver()
+        self.root.after(FRAME_MS, self.tick)
+
+    def update_display(self):
+        start = time.perf_counter()
+        info_text = f"Current town: {self.current_town.name}\nDays left: {self.days_left}\n\n"
+        products_info = self.current_town.display_products()
+        for i, (info, color) in enumerate(products_info):
+            if self.shown_rows[i] != (info, color):  # Only redraw rows that changed
+                self.price_labels[i].config(text=info, fg=color)
+                self.shown_rows[i] = (info, color)
 
         inventory_info = self.player.display_inventory()
         for line in inventory_info:
             info_text += line + "\n"
 
-        self.info_label.config(text=info_text)
+        if info_text != self.shown_info:
+            self.info_label.config(text=info_text)
+            self.shown_info = info_text
+        self.root.update_idletasks()  # Include the redraw in the frame time
+        self.frame_times.append(time.perf_counter() - start)
+
+    def frame_time_report(self):
+        # Average frame time over the first and last ten turns; these should match
+        if not self.frame_times:
+            return "No frames drawn."
+        first = self.frame_times[:10]
+        last = self.frame_times[-10:]
+        report = (f"Frame time over {len(self.frame_times)} turns: "
+                  f"first 10 avg {1000 * sum(first) / len(first):.2f} ms, "
+                  f"last 10 avg {1000 * sum(last) / len(last):.2f} ms, "
+                  f"max {1000 * max(self.frame_times):.2f} ms")
+        if self.frame_intervals:
+            intervals = sorted(self.frame_intervals)
+            report += (f"\nTick interval over the last {len(intervals)} of {self.frames} ticks: "
+                       f"median {1000 * intervals[len(intervals) // 2]:.2f} ms, "
+                       f"p99 {1000 * intervals[int(len(intervals) * 0.99)]:.2f} ms, "
+                       f"max {1000 * intervals[-1]:.2f} ms; "
+                       f"{self.late_frames} of {self.frames} late (over {1000 * LATE_FRAME:.1f} ms, 60 fps is 16.7 ms)")
+        return report
+
+    def say(self, text, color="black"):
+        self.messages.append(text)
+        self.message_label.config(text="\n".join(self.messages), fg=color)
 
-    def process_action(self, event=None):
-        action = self.action_entry.get().lower()
+    def ask(self, prompt, answer):
+        # Puts the question in the panel; answer(text) runs when the player submits
+        self.pending = answer
+        self.action_label.config(text=prompt)
+        self.action_entry.focus_set()
+
+    def ask_integer(self, prompt, answer):
+        def check(text):
+            try:
+                number = int(text)
+            except ValueError:
+                self.say("Please enter a whole number.", "red")
+                self.ask(prompt, check)
+                return
+            answer(number)
+        self.ask(prompt, check)
+
+    def submit(self, event=None):
+        text = self.action_entry.get().strip()
+        self.action_entry.delete(0, tk.END)
+        if self.busy:
+            return
+        if self.pending:
+            answer, self.pending = self.pending, None
+            self.action_label.config(text=ACTION_PROMPT)
+            answer(text)
+        else:
+            self.process_action(text)
+
+    def set_busy(self, busy):
+        self.busy = busy
+        state = "disabled" if busy else "normal"
+        self.action_entry.config(state=state)
+        self.action_button.config(state=state)
+        if not busy:
+            self.action_entry.focus_set()
+
+    def process_action(self, action):
+        action = action.lower()
+        self.journal.action(self.day, action)
         if action == "travel":
             self.travel()
         elif action == "buy":
             self.buy()
         elif action == "sell":
             self.sell()
+        elif action == "save":
+            self.save()
         elif action == "quit":
+            self.journal.quit(self.day)
             self.root.quit()
         else:
-            messagebox.showerror("Error", "Invalid action. Try again.")
-        self.action_entry.delete(0, tk.END)
+            self.say("Invalid action. Try again.", "red")
+            self.end_day()
+
+    def record_score(self):
+        # Adds the final money to the local leaderboard and says where it placed
+        try:
+            with Leaderboard() as leaderboard:
+                rank = leaderboard.add(self.user_name, self.duration, self.player.money)
+                return leaderboard.describe_rank(rank, self.duration)
+        except sqlite3.Error as error:
+            return f"Could not record your score: {error}"
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
+        save_session(self.save_path, self)
+        self.journal.close()
+        self.worker.stop()
+        if self.instruments:
+            self.instruments.finish()
+        messagebox.showinfo("Saved", f"Game saved. Enter the name {self.user_name} next time to carry on.")
+        self.root.quit()
+
+    def end_day(self):
         self.days_left -= 1  # Decrease the number of days left
-        self.current_town.update_prices()  # Update prices after each action
+        self.journal.end_day(self.day - 1, self.days_left)
         if self.days_left <= 0:
             self.end_game()
-        else:
-            self.update_display()
+            return
+        # Prices in every town move on the worker thread while the window keeps drawing
+        self.set_busy(True)
+        self.worker.submit(self.update_markets, self.markets_updated)
+
+    def update_markets(self):
+        # Worker thread. The Tk thread leaves the towns alone until markets_updated runs.
+        self.price_table.update_prices()
+
+    def markets_updated(self, result, error):
+        if error:
+            print(f"Could not update prices: {error!r}")
+        self.journal.prices(self.day, self.town_index, self.current_town.prices())
+        self.set_busy(False)
+        self.update_display()
 
     def travel(self):
-        if self.random_encounter("police") or self.random_encounter("gang"):
+        self.run_encounters(list(self.encounter_table.types), self.choose_destination)
+
+    def run_encounters(self, remaining, then):
+        # Encounters come one at a time; then() runs once the player is past all of them
+        if not remaining:
+            then()
             return
-        
-        towns = "\n".join([f"{i}: {town.name}" for i, town in enumerate(self.towns)])
-        choice = simpledialog.askinteger("Travel", f"Choose a town to travel to:\n{towns}")
+        type = remaining.pop(0)
+
+        def finished(caught):
+            if caught:
+                self.end_day()
+            else:
+                self.run_encounters(remaining, then)
+        self.random_encounter(type, finished)
+
+    def choose_destination(self):
+        towns = "\n".join([f"{i}: {town.name}{self.trip_length(i)}" for i, town in enumerate(self.towns)])
+        self.ask_integer(f"Choose a town to travel to:\n{towns}", self.arrive)
+
+    def arrive(self, choice):
         if 0 <= choice < len(self.towns):
-            self.current_town = self.towns[choice]
-            messagebox.showinfo("Travel", f"Traveled to {self.current_town.name}")
+            days = self.world_map.travel_days(self.town_index, choice)
+            if days is None or days > self.days_left:
+                self.say(f"You can't reach {self.towns[choice].name} in the days you have left.", "red")
+            else:
+                self.journal.arrive(self.day, choice)  # Stamped with the day the trip starts, like its rolls
+                self.town_index = choice
+                self.current_town = self.towns[choice]
+                if days > 1:
+                    self.days_left -= days - 1  # The action's own day covers the first day on the road
+                self.say(f"Traveled to {self.current_town.name}")
         else:
-            messagebox.showerror("Error", "Invalid choice.")
-
-    def random_encounter(self, type):
-        encounter_chance = random.random()
-        if encounter_chance < 0.3:  # 30% chance of an encounter
-            action = simpledialog.askstring("Encounter", f"You have encountered a {type}! Choose an action: fight, run, bribe:").lower()
-            if action == "fight":
-                if random.random() < 0.5:
-                    messagebox.showinfo("Fight", f"You successfully fought off the {type}!")
-                else:
-                    messagebox.showerror("Caught", f"You were caught by the {type}!")
-                    self.handle_failure()
-                    return True
-            elif action == "run":
-                if random.random() < 0.5:
-                    messagebox.showinfo("Run", f"You successfully ran away from the {type}!")
-                else:
-                    messagebox.showerror("Caught", f"You were caught by the {type}!")
-                    self.handle_failure()
-                    return True
-            elif action == "bribe":
-                bribe_amount = simpledialog.askinteger("Bribe", "Enter the amount to bribe:")
-                if bribe_amount > self.player.money:
-                    messagebox.showerror("Error", "Not enough money to bribe!")
-                    self.handle_failure()
-                    return True
-                self.player.money -= bribe_amount
-                if random.random() < 0.5:
-                    messagebox.showinfo("Bribe", f"The {type} accepted your bribe!")
-                else:
-                    messagebox.showerror("Bribe", f"The {type} rejected your bribe!")
-                    self.handle_failure()
-                    return True
+            self.say("Invalid choice.", "red")
+        self.end_day()
+
+    def trip_length(self, town):
+        if town == self.town_index:
+            return " (you are here)"
+        days = self.world_map.travel_days(self.town_index, town)
+        if days is None:
+            return " (no road)"
+        return f" ({days} day{'s' if days != 1 else ''})"
+
+    def roll(self):
+        value = self.encounter_rng.random()
+        self.journal.roll(self.day, value)  # Journal every draw so the game can be replayed
+        return value
+
+    def random_encounter(self, type, done):
+        # done(caught) runs once the encounter is over, or straight away if there is none
+        encounter_chance = self.roll()
+        if encounter_chance >= self.encounter_table.chance(type):  # 30% chance of an encounter by default
+            done(False)
+            return
+        self.ask(f"You have encountered a {type}! Choose an action: fight, run, bribe:",
+                 lambda action: self.answer_encounter(type, action.lower(), done))
+
+    def answer_encounter(self, type, action, done):
+        if action != "bribe":
+            self.journal.encounter(self.day, type, action)
+        if action == "fight":
+            if self.roll() < self.encounter_table.escape_chance(type, "fight"):
+                self.say(f"You successfully fought off the {type}!", "green")
+                done(False)
+            else:
+                self.say(f"You were caught by the {type}!", "red")
+                self.handle_failure()
+                done(True)
+        elif action == "run":
+            if self.roll() < self.encounter_table.escape_chance(type, "run"):
+                self.say(f"You successfully ran away from the {type}!", "green")
+                done(False)
             else:
-                messagebox.showerror("Caught", "Invalid action. You were caught!")
+                self.say(f"You were caught by the {type}!", "red")
                 self.handle_failure()
-                return True
-        return False
+                done(True)
+        elif action == "bribe":
+            self.ask_bribe(type, done)
+        else:
+            self.say("Invalid action. You were caught!", "red")
+            self.handle_failure()
+            done(True)
+
+    def ask_bribe(self, type, done):
+        self.ask_integer("Enter the amount to bribe:", lambda bribe_amount: self.pay_bribe(type, bribe_amount * 100, done))
+
+    def pay_bribe(self, type, bribe_amount, done):
+        if bribe_amount <= 0:  # A negative bribe would pay the player
+            self.say("Enter a bribe above zero.", "red")
+            self.ask_bribe(type, done)
+            return
+        self.journal.encounter(self.day, type, "bribe", bribe_amount)
+        if bribe_amount > self.player.money:
+            self.say("Not enough money to bribe!", "red")
+            self.handle_failure()
+            done(True)
+            return
+        self.player.money -= bribe_amount
+        self.journal.bribe(self.day, bribe_amount)
+        if self.roll() < self.encounter_table.escape_chance(type, "bribe"):
+            self.say(f"The {type} accepted your bribe!", "green")
+            done(False)
+        else:
+            self.say(f"The {type} rejected your bribe!", "red")
+            self.handle_failure()
+            done(True)
 
     def handle_failure(self):
-        messagebox.showerror("Failure", "You lost some money and inventory.")
-        loss_money = self.player.money * 0.1
-        self.player.money -= loss_money
-        messagebox.showinfo("Loss", f"You lost ${loss_money:.2f}.")
-        for product in list(self.player.inventory.keys()):  # Use list to avoid runtime error
-            loss_quantity = int(self.player.inventory[product] * 0.1)
-            self.player.inventory[product] -= loss_quantity
-            if self.player.inventory[product] == 0:
-                del self.player.inventory[product]
-            messagebox.showinfo("Loss", f"You lost {loss_quantity} of {product}.")
+        fraction = self.encounter_table.loss_fraction
+        self.journal.caught(self.day, fraction)
+        loss_money, lost = self.player.lose(fraction)
+        self.say(self.player.describe_loss(loss_money, lost), "red")  # One message for the whole loss
 
     def buy(self):
-        products_info = "\n".join([f"{i + 1}. {self.products[i].name}" for i in range(len(self.products))])
-        product_number = simpledialog.askinteger("Buy", f"Enter the product number to buy:\n{products_info}") - 1
-        quantity = simpledialog.askinteger("Quantity", "Enter the quantity to buy:")
+        products_info = "\n".join([f"{i + 1}. {product.name}" for i, product in enumerate(self.current_town.products)])
+        self.ask_integer(f"Enter the product number to buy:\n{products_info}",
+                         lambda number: self.ask_integer("Enter the quantity to buy:",
+                                                         lambda quantity: self.finish_buy(number - 1, quantity)))
+
+    def finish_buy(self, product_number, quantity):
         if 0 <= product_number < len(self.current_town.products):
             product = self.current_town.products[product_number]
+            money_before = self.player.money
             result = self.player.buy_product(product, quantity)
-            messagebox.showinfo("Buy", result)
+            if self.player.money != money_before:
+                self.journal.buy(self.day, product_number, quantity, product.current_price)
+            self.say(result)
         else:
-            messagebox.showerror("Error", "Product not found.")
+            self.say("Product not found.", "red")
+        self.end_day()
 
     def sell(self):
-        inventory_info = "\n".join([f"{i + 1}. {self.products[i].name}" for i in range(len(self.products))])
-        product_number = simpledialog.askinteger("Sell", f"Enter the product number to sell:\n{inventory_info}") - 1
-        quantity = simpledialog.askinteger("Quantity", "Enter the quantity to sell:")
+        inventory_info = "\n".join([f"{i + 1}. {product.name}" for i, product in enumerate(self.current_town.products)])
+        self.ask_integer(f"Enter the product number to sell:\n{inventory_info}",
+                         lambda number: self.ask_integer("Enter the quantity to sell:",
+                                                         lambda quantity: self.finish_sell(number - 1, quantity)))
+
+    def finish_sell(self, product_number, quantity):
         if 0 <= product_number < len(self.current_town.products):
             product = self.current_town.products[product_number]
+            money_before = self.player.money
             result = self.player.sell_product(product, quantity)
-            messagebox.showinfo("Sell", result)
+            if self.player.money != money_before:
+                self.journal.sell(self.day, product_number, quantity, product.current_price)
+            self.say(result)
         else:
-            messagebox.showerror("Error", "Product not found.")
+            self.say("Product not found.", "red")
+        self.end_day()
 
     def end_game(self):
-        messagebox.showinfo("Game Over", f"Game over! {self.user_name}, you ended with ${self.player.money:.2f}.")
+        self.journal.close()
+        if os.path.exists(self.save_path):
+            os.remove(self.save_path)  # The game is over, so there is nothing to resume
+        self.worker.stop()
+        if self.instruments:
+            print(self.frame_time_report())  # Goes with the profile summary, not every game
+            self.instruments.finish()
+        net_worth = self.player.net_worth(self.current_town.products)
+        messagebox.showinfo("Game Over", f"Game over! {self.user_name}, you ended with ${self.player.money / 100:.2f} "
+                                         f"(net worth ${net_worth / 100:.2f} at {self.current_town.name} prices).\n"
+                                         f"{self.record_score()}")
         self.root.quit()
 
 if __name__ == "__main__":
-    game = Game()
+    game = Game(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MAP)
     game.root.mainloop()
+    game.journal.close()
+    if game.instruments:
+        game.instruments.finish()
@@ -0,0 +1,188 @@
+import json
+import math
+
+# The encounter rules as data. A trip meets each row of the table in order;
+# meeting one happens with its chance, and the player's response gets them
+# away with that response's escape chance. Being caught ends the trip and
+# costs loss_fraction of the money and of every product held. A response not
+# in the row (anything mistyped) is always caught.
+#
+# Because the table is plain numbers, the outcome of a trip can be worked out
+# exactly instead of simulated: outcomes() lists every way a trip can end
+# with its probability, expected_travel() and expected_after_trips() give
+# expected values, and sample_travel() plays one trip for a whole batch of
+# players with a single NumPy draw.
+
+DEFAULT_ENCOUNTERS = [
+    # type, chance of meeting them on a trip, chance each response gets away
+    ("police", 0.3, {"fight": 0.5, "run": 0.5, "bribe": 0.5}),
+    ("gang", 0.3, {"fight": 0.5, "run": 0.5, "bribe": 0.5}),
+]
+DEFAULT_LOSS_FRACTION = 0.1
+
+
+class Outcome:
+    __slots__ = ("probability", "paid", "caught")
+
+    def __init__(self, probability, paid, caught):
+        self.probability = probability
+        self.paid = paid  # bribes handed over on the way
+        self.caught = caught
+
+    def __repr__(self):
+        return f"Outcome(probability={self.probability:.6f}, paid={self.paid}, caught={self.caught})"
+
+
+class TravelExpectation:
+    def __init__(self, money, inventory, caught, encounters):
+        self.money = money
+        self.inventory = inventory
+        self.caught = caught
+        self.encounters = encounters
+
+
+class EncounterTable:
+    def __init__(self, rows=DEFAULT_ENCOUNTERS, loss_fraction=DEFAULT_LOSS_FRACTION):
+        self.rows = [(type, chance, dict(escapes)) for type, chance, escapes in rows]
+        self.loss_fraction = loss_fraction
+        self.types = [row[0] for row in self.rows]
+        self.by_type = {row[0]: row for row in self.rows}
+
+    @classmethod
+    def from_rules(cls, rules, types=("police", "gang")):
+        # The same chance and escape chance for every encounter, as Rules describes them
+        escapes = {"fight": rules.escape_chance, "run": rules.escape_chance, "bribe": rules.escape_chance}
+        return cls([(type, rules.encounter_chance, escapes) for type in types], rules.loss_fraction)
+
+    @classmethod
+    def load(cls, path):
+        # {"loss_fraction": 0.1, "encounters": [{"type": "police", "chance": 0.3, "escape": {"fight": 0.5, ...}}, ...]}
+        with open(path) as table_file:
+            data = json.load(table_file)
+        rows = [(row["type"], row["chance"], row["escape"]) for row in data["encounters"]]
+        return cls(rows, data.get("loss_fraction", DEFAULT_LOSS_FRACTION))
+
+    def chance(self, type):
+        return self.by_type[type][1]
+
+    def escape_chance(self, type, response):
+        return self.by_type[type][2].get(response, 0.0)
+
+    def lose(self, quantity):
+        return quantity - int(quantity * self.loss_fraction)
+
+    def outcomes(self, money, responses=None):
+        # Every way one trip can end, merged by bribes paid and whether it was
+        # caught. responses maps a type to ("fight",), ("run",) or ("bribe", amount);
+        # types not listed run.
+        responses = responses or {}
+        live = {0: 1.0}  # bribes paid so far -> probability of still being on the road
+        ended = {}
+        for type, chance, escapes in self.rows:
+            response = responses.get(type, ("run",))
+            next_live = {}
+            for paid, probability in live.items():
+                next_live[paid] = next_live.get(paid, 0.0) + probability * (1 - chance)
+                met = probability * chance
+                escape = escapes.get(response[0], 0.0)
+                if response[0] == "bribe":
+                    if response[1] <= money - paid:
+                        paid += response[1]
+                    else:
+                        escape = 0.0  # Can't pay, so caught
+                if escape:
+                    next_live[paid] = next_live.get(paid, 0.0) + met * escape
+                if escape < 1:
+                    ended[paid, True] = ended.get((paid, True), 0.0) + met * (1 - escape)
+            live = next_live
+        for paid, probability in live.items():
+            ended[paid, False] = ended.get((paid, False), 0.0) + probability
+        return [Outcome(probability, paid, caught) for (paid, caught), probability in sorted(ended.items())]
+
+    def caught_chance(self, responses=None):
+        return sum(outcome.probability for outcome in self.outcomes(math.inf, responses) if outcome.caught)
+
+    def money_distribution(self, money, responses=None):
+        # [(money after the trip, probability)] for every reachable amount, in
+        # cents, with a catch rounded to the cent as Player.lose takes it
+        distribution = {}
+        for outcome in self.outcomes(money, responses):
+            after = money - outcome.paid
+            if outcome.caught:
+                after -= round(after * self.loss_fraction)
+            distribution[after] = distribution.get(after, 0.0) + outcome.probability
+        return sorted(distribution.items())
+
+    def inventory_distribution(self, inventory, responses=None):
+        # Product losses only happen when caught, so there are just two outcomes
+        caught = self.caught_chance(responses)
+        return [(list(inventory), 1 - caught), ([self.lose(quantity) for quantity in inventory], caught)]
+
+    def expected_encounters(self, money=math.inf, responses=None):
+        responses = responses or {}
+        expected = 0.0
+        on_road = 1.0
+        for type, chance, escapes in self.rows:
+            response = responses.get(type, ("run",))
+            escape = escapes.get(response[0], 0.0)
+            if response[0] == "bribe" and response[1] > money:
+                escape = 0.0
+            expected += on_road * chance
+            on_road *= 1 - chance * (1 - escape)
+        return expected
+
+    def expected_travel(self, money, inventory, responses=None):
+        caught = sum(outcome.probability for outcome in self.outcomes(money, responses) if outcome.caught)
+        expected_money = sum(after * probability for after, probability in self.money_distribution(money, responses))
+        expected_inventory = [(1 - caught) * quantity + caught * self.lose(quantity) for quantity in inventory]
+        return TravelExpectation(expected_money, expected_inventory, caught,
+                                 self.expected_encounters(money, responses))
+
+    def catches_after_trips(self, trips, responses=None):
+        # Probability of being caught exactly k times in trips trips, k = 0..trips
+        if any(response[0] == "bribe" for response in (responses or {}).values()):
+            raise ValueError("bribes depend on the money left; use outcomes() one trip at a time")
+        p = self.caught_chance(responses)
+        return [math.comb(trips, k) * p ** k * (1 - p) ** (trips - k) for k in range(trips + 1)]
+
+    def expected_after_trips(self, money, inventory, trips, responses=None):
+        # Exact expected money and inventory after trips trips with fight or run responses
+        catches = self.catches_after_trips(trips, responses)
+        expected_money = money * (1 - self.caught_chance(responses) * self.loss_fraction) ** trips
+        expected_inventory = [0.0] * len(inventory)
+        held = list(inventory)
+        for probability in catches:
+            for i, quantity in enumerate(held):
+                expected_inventory[i] += probability * quantity
+            held = [self.lose(quantity) for quantity in held]
+        return TravelExpectation(expected_money, expected_inventory, 1 - catches[0],
+                                 trips * self.expected_encounters(math.inf, responses))
+
+    def sample_travel(self, money, inventory, responses=None, rng=None):
+        # One trip for a whole batch of players. money is an integer array of cents
+        # (players,), inventory an integer array (players, products); both are
+        # updated in place, losing what Player.lose would. Returns the caught and
+        # encounter count arrays.
+        import numpy as np
+        responses = responses or {}
+        rng = rng or np.random.default_rng()
+        players = len(money)
+        draws = rng.random((players, len(self.rows), 2))
+        on_road = np.ones(players, dtype=bool)
+        caught = np.zeros(players, dtype=bool)
+        encounters = np.zeros(players, dtype=np.int64)
+        for i, (type, chance, escapes) in enumerate(self.rows):
+            response = responses.get(type, ("run",))
+            met = on_road & (draws[:, i, 0] < chance)
+            encounters += met
+            away = draws[:, i, 1] < escapes.get(response[0], 0.0)
+            if response[0] == "bribe":
+                pays = met & (money >= response[1])
+                money[pays] -= response[1]
+                away &= pays
+            failed = met & ~away
+            caught |= failed
+            on_road &= ~failed
+        money[caught] -= np.rint(money[caught] * self.loss_fraction).astype(money.dtype)  # Half to even, like round()
+        inventory[caught] -= (inventory[caught] * self.loss_fraction).astype(inventory.dtype)
+        return caught, encounters
@@ -0,0 +1,98 @@
+import math
+from array import array
+
+# The last few days of prices for many series at once: every (town, product)
+# pair of a PriceTable (prices.py). Prices are int64 cents in one flat ring of
+# size + 1 days, one row of every series per day, so a day's prices go in
+# with a single slice assignment and each series costs 8 bytes a day, 64 with
+# the default week. The extra day is the one before the window, which the
+# first change in the window is measured from. The current and previous
+# prices are the two newest days of the ring, so nothing else keeps them.
+#
+# The average, low, high, volatility and trend of a series are worked out
+# together when asked for, in one pass over its size + 1 prices at most. Only
+# the prices on screen are ever summarized, so keeping running sums for every
+# series would cost more memory than it saves time.
+
+DEFAULT_WINDOW = 7
+
+
+class PriceHistory:
+    __slots__ = ("size", "series", "ring", "count")
+
+    def __init__(self, series, size=DEFAULT_WINDOW):
+        self.size = size
+        self.series = series
+        self.ring = array('q', bytes(8 * series * (size + 1)))
+        self.count = 0  # Days added so far; the newest one is day count - 1
+
+    def add(self, prices):
+        # prices is an array('q') of one price for every series, in series order
+        start = self.count % (self.size + 1) * self.series
+        self.ring[start:start + self.series] = prices
+        self.count += 1
+
+    def restore(self, ring, count):
+        # Puts back a ring saved with its count (see snapshot.py)
+        self.ring = array('q', ring)
+        self.count = count
+
+    def row(self, back=0):
+        # Where the day back days before the newest starts in the ring; the first day stands in for days before it
+        day = max(self.count - 1 - back, 0)
+        return day % (self.size + 1) * self.series
+
+    def latest(self, index):
+        return self.ring[self.row() + index]
+
+    def previous(self, index):
+        return self.ring[self.row(1) + index]
+
+    def recent(self, index):
+        # The prices of one series the ring still holds, oldest first: the window and the day before it
+        slots = self.size + 1
+        series = self.series
+        ring = self.ring
+        return [ring[day % slots * series + index] for day in range(max(self.count - slots, 0), self.count)]
+
+    def days(self):
+        return min(self.count, self.size)
+
+    def average(self, index):
+        return self.stats(self.recent(index))[0]
+
+    def low(self, index):
+        return self.stats(self.recent(index))[1]
+
+    def high(self, index):
+        return self.stats(self.recent(index))[2]
+
+    def volatility(self, index):
+        return self.stats(self.recent(index))[3]
+
+    def trend(self, index):
+        return self.stats(self.recent(index))[4]
+
+    def stats(self, prices):
+        # Average, low, high, volatility and trend from one series' last size + 1 prices, oldest first
+        window = prices[-self.size:]
+        if not window:
+            return 0.0, 0, 0, 0.0, 0.0
+        average = sum(window) / len(window)
+        # Volatility: standard deviation of the daily percent changes in the window
+        changes = [(b - a) / a * 100 if a else 0.0 for a, b in zip(prices, prices[1:])]
+        volatility = 0.0
+        if len(changes) >= 2:
+            mean = sum(changes) / len(changes)
+            volatility = math.sqrt(sum((change - mean) ** 2 for change in changes) / (len(changes) - 1))
+        # Trend: percent the latest price sits above (or below) the moving average
+        trend = round((prices[-1] - average) / average * 100, 2) if average else 0.0
+        return average, min(window), max(window), volatility, trend
+
+    def summary(self, index):
+        average, low, high, volatility, trend = self.stats(self.recent(index))
+        return (f"{self.days()}-day avg ${average / 100:.2f} (now {trend:+.1f}%), low ${low / 100:.2f}, "
+                f"high ${high / 100:.2f}, volatility {volatility:.1f}%")
+
+    def memory_size(self):
+        return self.ring.buffer_info()[1] * self.ring.itemsize
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import threading
+
+# Pre-scaled background images. Scaling the background to the screen is the
+# slow part of starting the tkinter game, so the result is saved as a PPM
+# keyed by the source file's hash and the screen size. Tk reads PPM files
+# itself, so on a warm cache Pillow is never imported.
+
+
+def cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dope-warz")
+
+
+def source_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def scaled_image_path(source, size):
+    width, height = size
+    path = os.path.join(cache_dir(), f"{source_hash(source)}-{width}x{height}.ppm")
+    if not os.path.exists(path):
+        from PIL import Image  # Only needed on a cache miss
+        image = Image.open(source).convert("RGB").resize((width, height), Image.LANCZOS)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        image.save(temporary, "PPM")
+        os.replace(temporary, path)  # Never leave a half-written file in the cache
+    return path
+
+
+class BackgroundLoader:
+    # Finds or builds the scaled image on a worker thread. Tk objects can only
+    # be made on the Tk thread, so the game polls done() and loads path itself.
+
+    def __init__(self, source, size):
+        self.path = None
+        self.error = None
+        self.thread = threading.Thread(target=self.run, args=(source, size), daemon=True)
+        self.thread.start()
+
+    def run(self, source, size):
+        try:
+            self.path = scaled_image_path(source, size)
+        except (OSError, ImportError) as error:
+            self.error = error
+
+    def done(self):
+        return not self.thread.is_alive()
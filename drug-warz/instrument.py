@@ -0,0 +1,192 @@
+import json
+import os
+import sys
+import time
+
+# Opt-in profiling for a running Game. instrument() wraps the game's own
+# methods (travel, buy, sell, random_encounter, update_prices, display) so a
+# game that is not instrumented runs exactly the code it always did. It also
+# counts random number draws per turn, read off the positions of the game's
+# random streams (streams.py), and net allocated memory blocks per turn, and
+# keeps time spent waiting for the player out of the action times.
+#
+# Set DOPE_WARZ_PROFILE=trace.json to turn it on in either front end; a summary
+# table is printed at game end and the trace opens in chrome://tracing or
+# https://ui.perfetto.dev.
+
+PROFILE_ENV = "DOPE_WARZ_PROFILE"
+
+STREAMS = ["market_rng", "encounter_rng", "policy_rng"]
+ACTIONS = ["travel", "buy", "sell", "random_encounter", "handle_failure", "process_action"]
+DISPLAYS = ["update_display"]
+
+
+class Instruments:
+    def __init__(self, game, trace_path=None):
+        self.game = game
+        self.trace_path = trace_path
+        self.clock = time.perf_counter
+        self.origin = self.clock()
+        self.events = []
+        self.stack = []  # [name, start, time spent waiting inside]
+        self.totals = {}  # name -> [count, total, own time, longest]
+        self.turns = []
+        self.turn_day = None
+        self.turn_start = None
+        self.turn_draws = 0
+        self.turn_blocks = 0
+        self.turn_waiting = 0.0
+        self.waiting = 0.0
+        self.restore = []
+        self.finished = False
+
+    def day(self):
+        return getattr(self.game, "day", None)
+
+    def draws(self):
+        # Numbers drawn so far from the game's streams; each Stream counts its own
+        streams = (getattr(self.game, name, None) for name in STREAMS)
+        return sum(stream.position for stream in streams if stream is not None)
+
+    def check_turn(self):
+        # A turn ends whenever the game's day changes
+        day = self.day()
+        if day != self.turn_day:
+            self.end_turn()
+            self.turn_day = day
+            self.turn_start = self.clock()
+            self.turn_draws = self.draws()
+            self.turn_blocks = sys.getallocatedblocks()
+            self.turn_waiting = self.waiting
+
+    def end_turn(self):
+        if self.turn_start is None:
+            return
+        now = self.clock()
+        turn = {
+            "day": self.turn_day,
+            "time": now - self.turn_start - (self.waiting - self.turn_waiting),
+            "draws": self.draws() - self.turn_draws,
+            "blocks": sys.getallocatedblocks() - self.turn_blocks,
+        }
+        self.turns.append(turn)
+        self.events.append({"name": "turn", "ph": "C", "pid": 1, "tid": 1, "ts": self.micros(now),
+                            "args": {"rng_draws": turn["draws"], "allocated_blocks": turn["blocks"]}})
+        self.turn_start = None
+
+    def micros(self, moment):
+        return (moment - self.origin) * 1e6
+
+    def span(self, name, func):
+        def timed(*args, **kwargs):
+            self.check_turn()
+            frame = [name, self.clock(), 0.0]
+            self.stack.append(frame)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = self.clock()
+                self.stack.pop()
+                self.record(name, frame[1], end, frame[2])
+                if self.stack:
+                    self.stack[-1][2] += frame[2]  # Waiting inside a child is waiting in the parent too
+        return timed
+
+    def wait(self, func):
+        # Time spent in input() or a dialog belongs to the player, not the game
+        def waiting(*args, **kwargs):
+            start = self.clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = self.clock()
+                self.waiting += end - start
+                if self.stack:
+                    self.stack[-1][2] += end - start
+                self.events.append({"name": "waiting for player", "ph": "X", "pid": 1, "tid": 1,
+                                    "ts": self.micros(start), "dur": (end - start) * 1e6})
+        return waiting
+
+    def record(self, name, start, end, waited):
+        elapsed = end - start
+        own = elapsed - waited
+        total = self.totals.setdefault(name, [0, 0.0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += elapsed
+        total[2] += own
+        total[3] = max(total[3], own)
+        self.events.append({"name": name, "ph": "X", "pid": 1, "tid": 1, "ts": self.micros(start),
+                            "dur": elapsed * 1e6, "args": {"day": self.day(), "waiting_ms": waited * 1000}})
+
+    def patch(self, target, name, wrapper):
+        original = getattr(target, name)
+        in_dict = name in getattr(target, "__dict__", {})
+        setattr(target, name, wrapper(original))
+        self.restore.append((target, name, original, in_dict))
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self.end_turn()
+        for target, name, original, in_dict in reversed(self.restore):
+            if in_dict:
+                setattr(target, name, original)
+            else:
+                delattr(target, name)
+        self.restore.clear()
+        print(self.summary())
+        if self.trace_path:
+            self.write_trace(self.trace_path)
+            print(f"Trace written to {self.trace_path}")
+
+    def write_trace(self, path):
+        with open(path, "w") as trace:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, trace)
+
+    def summary(self):
+        lines = [f"{'section':18} {'calls':>7} {'total ms':>10} {'own ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        for name, (calls, total, own, longest) in sorted(self.totals.items(), key=lambda item: -item[1][2]):
+            lines.append(f"{name:18} {calls:7} {total * 1000:10.2f} {own * 1000:10.2f} "
+                         f"{own / calls * 1000:9.3f} {longest * 1000:9.3f}")
+        lines.append("own ms leaves out time spent waiting for the player.")
+        if self.turns:
+            turns = len(self.turns)
+            lines.append(f"Turns: {turns}, mean {sum(t['time'] for t in self.turns) / turns * 1000:.3f} ms, "
+                         f"{sum(t['draws'] for t in self.turns) / turns:.1f} random draws and "
+                         f"{sum(t['blocks'] for t in self.turns) / turns:+.1f} allocated blocks per turn")
+            slowest = sorted(self.turns, key=lambda t: -t["time"])[:5]
+            lines.append("Slowest turns: " + ", ".join(f"day {t['day'] + 1 if t['day'] is not None else '?'} "
+                                                      f"({t['time'] * 1000:.2f} ms)" for t in slowest))
+        return "\n".join(lines)
+
+
+def instrument(game, trace_path=None, waits=()):
+    # Wraps the methods a Game has. waits lists (object, name) pairs that block on the player.
+    instruments = Instruments(game, trace_path)
+    for name in ACTIONS:
+        if hasattr(game, name):
+            label = "encounter" if name == "random_encounter" else name
+            instruments.patch(game, name, lambda func, label=label: instruments.span(label, func))
+    for name in DISPLAYS:
+        if hasattr(game, name):
+            instruments.patch(game, name, lambda func: instruments.span("display", func))
+    price_table = getattr(game, "price_table", None)
+    if price_table is not None:
+        instruments.patch(price_table, "update_prices", lambda func: instruments.span("update_prices", func))
+    for town in game.towns:
+        if hasattr(town, "display_products"):
+            instruments.patch(town, "display_products", lambda func: instruments.span("display", func))
+    player = getattr(game, "player", None)
+    if player is not None and hasattr(player, "display_inventory"):
+        instruments.patch(player, "display_inventory", lambda func: instruments.span("display", func))
+    for target, name in waits:
+        instruments.patch(target, name, instruments.wait)
+    return instruments
+
+
+def instrument_from_env(game, waits=()):
+    trace_path = os.environ.get(PROFILE_ENV)
+    if not trace_path:
+        return None
+    return instrument(game, trace_path, waits=waits)
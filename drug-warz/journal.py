@@ -0,0 +1,131 @@
+import os
+import struct
+import time
+
+# Append-only binary journal of a game. The file starts with MAGIC and the
+# names of the game's towns and products, so replay can name them on any map.
+# After that every record is the same 21 bytes:
+# kind, day, two integer arguments and a float, so a file can be read back
+# with struct.iter_unpack and a torn record at the end after a crash is simply
+# dropped. Records are buffered and written out at the end of every day.
+#
+# Effect records (BUY, SELL, ARRIVE, BRIBE, CAUGHT, ...) carry the outcome of
+# every random draw and every choice, so replay applies them without random
+# numbers or input. ACTION, ROLL and ENCOUNTER records keep what the player
+# typed and what was rolled, and PRICE records the prices the player was
+# shown each day, for settling disputes. Only the player's own town's prices
+# go in: the other towns' are never seen, and on a big map they would be
+# most of the file.
+#
+# Money is in cents throughout, as the games count it: amounts of money go in
+# the integer argument, and prices, which share a record with a product and
+# a quantity, go in the float as whole cents (exact well past any price).
+
+MAGIC = b"DWJ\x03"
+NAMES = struct.Struct("<I")  # Byte length of a "\n"-joined list of names that follows
+RECORD = struct.Struct("<BHHqd")
+
+START = 1      # a=duration, b=starting money
+PRICE = 2      # a=town, b=product, value=price
+ACTION = 3     # a=action code, b=argument
+BUY = 4        # a=product, b=quantity, value=price
+SELL = 5       # a=product, b=quantity, value=price
+ARRIVE = 6     # a=town, stamped with the day the trip starts
+ROLL = 7       # value=random draw
+ENCOUNTER = 8  # a=encounter type, b=response code, value=bribe offered
+BRIBE = 9      # b=bribe paid
+CAUGHT = 10    # value=fraction of money and inventory lost
+END_DAY = 11   # a=days left afterwards, stamped with the last day the turn used
+QUIT = 12
+
+ACTIONS = ["invalid", "travel", "buy", "sell", "quit", "save"]
+ENCOUNTER_TYPES = ["police", "gang"]
+RESPONSES = ["invalid", "fight", "run", "bribe"]
+
+JOURNAL_DIR = "journals"
+
+
+def code(names, name):
+    return names.index(name) if name in names else 0
+
+
+def header(town_names, product_names):
+    parts = [MAGIC]
+    for names in (town_names, product_names):
+        text = "\n".join(names).encode()
+        parts += [NAMES.pack(len(text)), text]
+    return b"".join(parts)
+
+
+class Journal:
+    def __init__(self, path, town_names=(), product_names=()):
+        # The names only go in when the file is new; a resumed game carries on after its records
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        self.buffer = bytearray(header(town_names, product_names) if new else b"")
+        self.pack = RECORD.pack
+
+    @classmethod
+    def for_session(cls, user_name, town_names=(), product_names=(), directory=JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        safe_name = "".join(c for c in user_name or "player" if c.isalnum()) or "player"
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return cls(os.path.join(directory, f"{stamp}-{safe_name}.dwj"), town_names, product_names)
+
+    def record(self, kind, day=0, a=0, b=0, value=0.0):
+        self.buffer += self.pack(kind, day, a, b, value)
+
+    def start(self, duration, money):
+        self.record(START, 0, duration, money)
+
+    def prices(self, day, town, prices):
+        # The day's prices in the town the player is in, one per product
+        pack = self.pack
+        buffer = self.buffer
+        for product, price in enumerate(prices):
+            buffer += pack(PRICE, day, town, product, price)
+
+    def action(self, day, name, argument=0):
+        self.record(ACTION, day, code(ACTIONS, name), argument)
+
+    def buy(self, day, product, quantity, price):
+        self.record(BUY, day, product, quantity, price)
+
+    def sell(self, day, product, quantity, price):
+        self.record(SELL, day, product, quantity, price)
+
+    def arrive(self, day, town):
+        self.record(ARRIVE, day, town)
+
+    def roll(self, day, value):
+        self.record(ROLL, day, 0, 0, value)
+
+    def encounter(self, day, type, response, bribe_amount=0):
+        self.record(ENCOUNTER, day, code(ENCOUNTER_TYPES, type), code(RESPONSES, response), bribe_amount)
+
+    def bribe(self, day, amount):
+        self.record(BRIBE, day, 0, amount)
+
+    def caught(self, day, fraction):
+        self.record(CAUGHT, day, 0, 0, fraction)
+
+    def end_day(self, day, days_left):
+        self.record(END_DAY, day, days_left)
+        self.flush()
+
+    def quit(self, day):
+        self.record(QUIT, day)
+        self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer.clear()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
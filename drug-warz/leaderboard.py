@@ -0,0 +1,223 @@
+import argparse
+import contextlib
+import math
+import sqlite3
+import time
+from collections import Counter
+
+# High scores in SQLite. A score is the money a game ended with, in whole
+# cents, so every comparison is exact. Scores are indexed by (duration, score),
+# by score alone and by seed, so the top few of any duration are read straight
+# off an index.
+#
+# Rank and percentile questions would otherwise count every row above a
+# score. The score_buckets table keeps a count of games per duration and
+# score bucket instead. Buckets are exact up to $1.27 and then at most 1.6%
+# wide, a few hundred in all, so a rank adds up the buckets above the score
+# and counts only the rows inside its own bucket.
+#
+#   python leaderboard.py --duration 30 --top 10
+#   python leaderboard.py --percentiles 50 90 99
+
+DEFAULT_PATH = "leaderboard.db"
+SUB_BUCKETS = 64
+BULK_GAMES = 100000  # Fewest games worth rebuilding the indexes for
+INDEXES = ["scores_by_duration", "scores_by_score", "scores_by_seed"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    seed INTEGER,
+    score INTEGER NOT NULL,
+    played REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_duration ON scores (duration, score);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score);
+CREATE INDEX IF NOT EXISTS scores_by_seed ON scores (seed);
+CREATE TABLE IF NOT EXISTS score_buckets (
+    duration INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    PRIMARY KEY (duration, bucket)
+) WITHOUT ROWID;
+"""
+
+
+def bucket(score):
+    # Scores below 2 * SUB_BUCKETS cents get a bucket each; above that, each
+    # doubling is split into SUB_BUCKETS buckets
+    if score < 2 * SUB_BUCKETS:
+        return score
+    shift = score.bit_length() - 7
+    return (shift << 6) + (score >> shift)
+
+
+def bucket_floor(number):
+    # The lowest score in a bucket
+    if number < 2 * SUB_BUCKETS:
+        return number
+    shift = (number >> 6) - 1
+    return (number - (shift << 6)) << shift
+
+
+class Leaderboard:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA cache_size=-65536")  # 64 MB of pages, so big batches update the indexes in memory
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, name, duration, score, seed=None):
+        # Records one finished game (its final money in cents) and returns its rank
+        # among games of the same length
+        score = max(score, 0)
+        self.add_many([(name, duration, seed, score)])
+        return self.rank(score, duration)
+
+    def add_many(self, games):
+        # games yields (name, duration, seed, score in cents). They go in as one
+        # transaction, however many there are.
+        played = time.time()
+        buckets = Counter()
+        rows = []
+        for name, duration, seed, score in games:
+            rows.append((name, duration, seed, score, played))
+            buckets[duration, bucket(score)] += 1
+        rows.sort(key=lambda row: (row[1], row[3]))  # Neighbouring index entries go in together
+        with self.connection:
+            self.connection.executemany("INSERT INTO scores (name, duration, seed, score, played) VALUES (?, ?, ?, ?, ?)",
+                                        rows)
+            self.connection.executemany(
+                "INSERT INTO score_buckets (duration, bucket, games) VALUES (?, ?, ?) "
+                "ON CONFLICT (duration, bucket) DO UPDATE SET games = games + excluded.games",
+                [(duration, number, games) for (duration, number), games in buckets.items()])
+        return len(rows)
+
+    @contextlib.contextmanager
+    def bulk(self, games):
+        # Wrap a big load of about this many games. When there are at least as many
+        # as the table already holds, the indexes are dropped and built again at the
+        # end, which is a lot quicker than updating them a row at a time. If the load
+        # is cut short, the next open builds them again.
+        rebuild = games >= max(BULK_GAMES, self.count())
+        if rebuild:
+            with self.connection:
+                for index in INDEXES:
+                    self.connection.execute(f"DROP INDEX IF EXISTS {index}")
+        try:
+            yield self
+        finally:
+            if rebuild:
+                self.connection.executescript(SCHEMA)
+
+    def bucket_counts(self, duration=None):
+        # [(bucket, games)] from the lowest bucket up
+        if duration is None:
+            query = self.connection.execute("SELECT bucket, SUM(games) FROM score_buckets GROUP BY bucket ORDER BY bucket")
+        else:
+            query = self.connection.execute("SELECT bucket, games FROM score_buckets WHERE duration = ? ORDER BY bucket",
+                                            (duration,))
+        return query.fetchall()
+
+    def count(self, duration=None):
+        return sum(games for _, games in self.bucket_counts(duration))
+
+    def count_between(self, low, high, duration=None):
+        # Games with low <= score < high
+        if duration is None:
+            query = self.connection.execute("SELECT COUNT(*) FROM scores WHERE score >= ? AND score < ?", (low, high))
+        else:
+            query = self.connection.execute("SELECT COUNT(*) FROM scores WHERE duration = ? AND score >= ? AND score < ?",
+                                            (duration, low, high))
+        return query.fetchone()[0]
+
+    def rank(self, score, duration=None):
+        # 1 + the number of games that ended with more
+        own = bucket(score)
+        above = sum(games for number, games in self.bucket_counts(duration) if number > own)
+        return 1 + above + self.count_between(score + 1, bucket_floor(own + 1), duration)
+
+    def percentile(self, percent, duration=None):
+        # The score percent% of games ended at or below (nearest rank), or None with no games
+        counts = self.bucket_counts(duration)
+        total = sum(games for _, games in counts)
+        if not total:
+            return None
+        position = min(max(math.ceil(percent / 100 * total), 1), total) - 1
+        for number, games in counts:
+            if position < games:
+                break
+            position -= games
+        if duration is None:
+            query = self.connection.execute(
+                "SELECT score FROM scores WHERE score >= ? AND score < ? ORDER BY score LIMIT 1 OFFSET ?",
+                (bucket_floor(number), bucket_floor(number + 1), position))
+        else:
+            query = self.connection.execute(
+                "SELECT score FROM scores WHERE duration = ? AND score >= ? AND score < ? ORDER BY score LIMIT 1 OFFSET ?",
+                (duration, bucket_floor(number), bucket_floor(number + 1), position))
+        return query.fetchone()[0]
+
+    def top(self, k=10, duration=None):
+        # [(name, duration, seed, score)] best first
+        if duration is None:
+            query = self.connection.execute(
+                "SELECT name, duration, seed, score FROM scores ORDER BY score DESC LIMIT ?", (k,))
+        else:
+            query = self.connection.execute(
+                "SELECT name, duration, seed, score FROM scores WHERE duration = ? ORDER BY score DESC LIMIT ?",
+                (duration, k))
+        return query.fetchall()
+
+    def by_seed(self, seed, duration=None):
+        # Every game played on one seeded world, best first, for comparing players
+        if duration is None:
+            query = self.connection.execute(
+                "SELECT name, duration, seed, score FROM scores WHERE seed = ? ORDER BY score DESC", (seed,))
+        else:
+            query = self.connection.execute(
+                "SELECT name, duration, seed, score FROM scores WHERE seed = ? AND duration = ? ORDER BY score DESC",
+                (seed, duration))
+        return query.fetchall()
+
+    def describe_rank(self, rank, duration):
+        # A line for the game-over message
+        total = self.count(duration)
+        return f"You placed #{rank:,} of {total:,} {duration}-day games (top {100 * rank / total:.1f}%)."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the Dope Warz high scores.")
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--duration", type=int, default=None, help="only games of this many days")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None, help="every game played on this seed instead")
+    parser.add_argument("--percentiles", type=float, nargs="*", default=[])
+    args = parser.parse_args()
+
+    with Leaderboard(args.path) as board:
+        rows = board.by_seed(args.seed, args.duration) if args.seed is not None else board.top(args.top, args.duration)
+        for place, (name, duration, seed, score) in enumerate(rows, 1):
+            print(f"{place:4}. {name:24} ${score / 100:14,.2f}  {duration} days" + (f", seed {seed}" if seed is not None else ""))
+        for percent in args.percentiles:
+            score = board.percentile(percent, args.duration)
+            if score is not None:
+                print(f"{percent:g}th percentile: ${score / 100:,.2f}")
+        print(f"{board.count(args.duration):,} games")
+
+
+if __name__ == "__main__":
+    main()
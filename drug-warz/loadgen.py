@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import random
+import time
+
+from server import raise_file_limit
+
+# Load generator for server.py. Opens many concurrent sessions that play
+# random games and reports the command round-trip latency.
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class Player(asyncio.Protocol):
+    # Callback-driven like the server, so the generator itself stays cheap
+    # enough to drive 10k sessions from one process.
+
+    def __init__(self, rng, latencies, world, stop_at, think_time, done):
+        self.rng = rng
+        self.latencies = latencies
+        self.world = world
+        self.stop_at = stop_at
+        self.think_time = think_time
+        self.done = done
+        self.buffer = b""
+        self.sent_at = None
+        self.commands = 0
+        self.errors = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        lines = (self.buffer + data).split(b"\n")
+        self.buffer = lines.pop()
+        for line in lines:
+            self.response_received(line.decode())
+
+    def response_received(self, response):
+        loop = asyncio.get_running_loop()
+        if response.startswith("WELCOME"):
+            if self.world:
+                self.send(f"join {self.world}")
+            else:
+                # Spread the sessions out so they don't all send at once
+                loop.call_later(self.rng.random() * self.think_time, self.send_next, "OK")
+            return
+        if self.sent_at is not None:
+            self.latencies.append(time.perf_counter() - self.sent_at)
+            self.sent_at = None
+            self.commands += 1
+        if response.startswith("OK joined"):
+            loop.call_later(self.rng.random() * self.think_time, self.send_next, "OK")
+        elif self.think_time:
+            loop.call_later(self.think_time * (0.5 + self.rng.random()), self.send_next, response)
+        else:
+            self.send_next(response)
+
+    def send_next(self, response):
+        if time.perf_counter() >= self.stop_at:
+            self.transport.write(b"quit\n")
+            self.transport.close()
+            return
+        self.send(self.next_command(response))
+
+    def send(self, command):
+        self.sent_at = time.perf_counter()
+        self.transport.write(command.encode() + b"\n")
+
+    def next_command(self, response):
+        if response.startswith("ENCOUNTER"):
+            return self.rng.choice(["fight", "run"])
+        if response.startswith("GAMEOVER"):
+            return "new"
+        roll = self.rng.random()
+        if roll < 0.3:
+            return "look"
+        if roll < 0.5:
+            return f"travel {self.rng.randrange(4)}"
+        if roll < 0.75:
+            return f"buy {self.rng.randint(1, 8)} {self.rng.randint(1, 20)}"
+        return f"sell {self.rng.randint(1, 8)} {self.rng.randint(1, 20)}"
+
+    def connection_lost(self, exc):
+        if exc is not None:
+            self.errors += 1
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+async def connect(loop, player, host, port):
+    try:
+        await loop.create_connection(lambda: player, host, port)
+    except OSError:
+        player.errors += 1
+        player.done.set_result(None)
+
+
+async def run(args):
+    loop = asyncio.get_running_loop()
+    rng = random.Random(args.seed)
+    latencies = []
+    stop_at = time.perf_counter() + args.ramp + args.seconds
+    players = []
+    for number in range(args.sessions):
+        player = Player(random.Random(rng.random()), latencies, number % args.worlds, stop_at,
+                        args.think_time, loop.create_future())
+        players.append(player)
+    # Connect in batches to stay under the listen backlog
+    for start in range(0, len(players), args.connect_batch):
+        batch = players[start:start + args.connect_batch]
+        await asyncio.gather(*(connect(loop, player, args.host, args.port) for player in batch))
+        await asyncio.sleep(args.ramp * args.connect_batch / max(len(players), 1))
+    measure_from = len(latencies)
+    await asyncio.gather(*(player.done for player in players))
+
+    measured = sorted(latencies[measure_from:] or latencies)
+    commands = sum(player.commands for player in players)
+    errors = sum(player.errors for player in players)
+    print(f"Sessions: {args.sessions} across {args.worlds} world(s)")
+    print(f"Commands: {commands:,} ({commands / (args.ramp + args.seconds):,.0f}/sec), errors: {errors}")
+    print(f"Latency p50: {percentile(measured, 0.50) * 1000:.2f} ms")
+    print(f"Latency p99: {percentile(measured, 0.99) * 1000:.2f} ms")
+    print(f"Latency max: {percentile(measured, 1.0) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open many sessions against server.py and measure latency.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--worlds", type=int, default=1, help="spread sessions over this many worlds")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to measure after ramp-up")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds spent opening connections")
+    parser.add_argument("--connect-batch", type=int, default=250)
+    parser.add_argument("--think-time", type=float, default=0.5, help="average seconds between a player's commands")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raise_file_limit()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
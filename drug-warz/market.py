@@ -0,0 +1,106 @@
+import numpy as np
+
+# Array-backed market. Prices live in (games, towns, products) matrices so a
+# whole world, or thousands of parallel worlds, move one day in a single step.
+# Prices are whole cents, like core.Product's, held in float64 so a day's
+# update never has to cast; every cent value a game can reach is exact.
+#
+# Every step writes into buffers the market keeps, so a day allocates nothing
+# but the colors it hands back.
+
+# Indexed by price direction (0 unchanged, 1 up, -1 down), so -1 picks the last
+TERMINAL_COLORS = np.array(["\033[0m", "\033[92m", "\033[91m"])
+TK_COLORS = np.array(["black", "green", "red"])
+
+
+def change_percentage(current, previous, out=None):
+    # Percent change rounded to 2 places, as Product.price_change_percentage does
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.divide(current, previous, out=out)
+    change -= 1
+    change *= 10000
+    np.rint(change, out=change)
+    change /= 100
+    if not previous.all():
+        change[previous == 0] = 0
+    return change
+
+
+def price_direction(change):
+    # -1 for a price drop, 0 for no change, 1 for a rise
+    return (change > 0).view(np.int8) - (change < 0).view(np.int8)
+
+
+class Market:
+    def __init__(self, base_prices, games=1, seed=None):
+        self.rng = np.random.default_rng(seed)
+        base_prices = np.asarray(base_prices, dtype=np.float64)
+        if base_prices.ndim == 2:
+            base_prices = np.broadcast_to(base_prices, (games,) + base_prices.shape)
+        self.base_prices = np.ascontiguousarray(base_prices)
+        # A price is base * uniform(0.8, 1.2) = low + spread * random()
+        self._low = self.base_prices * 0.8
+        self._spread = self.base_prices * 0.4
+        self.current_prices = self.get_prices()
+        self.previous_prices = self.current_prices.copy()
+        self._change = np.empty_like(self.current_prices)
+
+    @classmethod
+    def random(cls, towns, products, games=1, min_base_price=5, max_base_price=50, seed=None):
+        rng = np.random.default_rng(seed)
+        base_prices = rng.integers(min_base_price, max_base_price, size=(games, 1, products), endpoint=True) * 100
+        base_prices = np.repeat(base_prices, towns, axis=1)
+        return cls(base_prices, seed=rng.integers(2 ** 63))
+
+    @property
+    def shape(self):
+        return self.current_prices.shape
+
+    def get_prices(self):
+        prices = self.rng.random(self.base_prices.shape)
+        self._fluctuate(prices)
+        return prices
+
+    def _fluctuate(self, prices):
+        # Turns random() draws in prices into new prices, in place
+        np.multiply(prices, self._spread, out=prices)
+        np.add(prices, self._low, out=prices)
+        np.rint(prices, out=prices)
+
+    def update_prices(self):
+        # Same rule as Product.update_price, for every town of every game at once.
+        # Buffers are swapped instead of reallocated.
+        self.previous_prices, self.current_prices = self.current_prices, self.previous_prices
+        self.rng.random(out=self.current_prices)
+        self._fluctuate(self.current_prices)
+
+    def update_towns(self, towns):
+        # Like Town.update_prices: only the town each game is standing in moves.
+        # towns holds one town index per game.
+        games = np.arange(self.shape[0])
+        towns = np.asarray(towns)
+        self.previous_prices[games, towns] = self.current_prices[games, towns]
+        prices = self.rng.random((self.shape[0], self.shape[2]))
+        prices *= self._spread[games, towns]
+        prices += self._low[games, towns]
+        self.current_prices[games, towns] = np.rint(prices, out=prices)
+
+    def price_change_percentage(self):
+        # Written into a buffer the market reuses: copy it to keep it past the next call
+        return change_percentage(self.current_prices, self.previous_prices, out=self._change)
+
+    def colors(self, change=None, palette=TK_COLORS):
+        # Pass the price_change_percentage() just computed to save working it out again
+        if change is None:
+            change = self.price_change_percentage()
+        return palette.take(price_direction(change), mode="wrap")
+
+    def price_info(self, game, town, product_names, palette=TK_COLORS):
+        # Rows in the same shape Town.display_products returns in the tkinter front end
+        prices = self.current_prices[game, town]
+        changes = change_percentage(prices, self.previous_prices[game, town])
+        colors = palette.take(price_direction(changes), mode="wrap")
+        rows = []
+        for i, name in enumerate(product_names):
+            rows.append((f"{i + 1}. {name}: ${prices[i] / 100:.2f} ({changes[i]}% change from yesterday)", str(colors[i])))
+        return rows
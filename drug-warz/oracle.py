@@ -0,0 +1,333 @@
+import argparse
+import math
+import operator
+import time
+
+import numpy as np
+
+from core import Rules, cents
+from prices import PriceTable
+from streams import Stream
+from world_map import WorldMap
+
+# Optimal-play oracle. Given the price every product will have in every town on
+# every day, works out the most money a player can end with, and the plan that
+# gets there, so bots and human runs can be scored against a ceiling.
+#
+# Each turn allows one action, like Game.start: travel, buy or sell. Prices move
+# once a turn, and a trip uses up the days its route takes on the world map,
+# so a long road skips days of trading. Encounters are left out, so the
+# result is an upper bound for real games.
+#
+# The search is a day-by-day branch and bound over states (days left, town).
+# A state holds every way found to stand there: cash and the units held of
+# each product, since the change left after one buy can go on another product
+# and a partial trade can beat going all in. A way is dropped when another has
+# at least as much cash and at least as many units of everything.
+#
+# The bound is the same game with whole units and the one-action-a-day rule
+# relaxed: every cent and every unit takes its own best path to the end. Those
+# values are worked out backwards once per (turn, days left), and they are
+# linear, so a way is worth at most cash x (cent value) + units x (unit value)
+# and the bound of a buy or sell is linear in the quantity. Each turn a quick
+# finish from the most promising way, following the bound, gives a floor, and
+# only quantities whose bound reaches the floor are tried, which leaves a few
+# around all in or nothing.
+#
+# States also carry the days left, since trips of different lengths reach the
+# same turn with different amounts of time. When every town is one day from
+# every other (the default map), travel merges each position across all towns
+# once instead of once per pair of towns. On other maps the ways arriving at a
+# town with the same days left are pruned together, from wherever they set
+# out, before any of them become steps, and the bounds for every days left of
+# a turn come from one NumPy pass over (days left, from, to).
+
+CASH_SLACK = 1e-9  # Float error allowed in the bound before a way is dropped
+
+
+class Step:
+    __slots__ = ("cash", "units", "parent", "action")
+
+    def __init__(self, cash, units, parent, action):
+        self.cash = cash
+        self.units = units  # Units held of each product, a tuple
+        self.parent = parent
+        self.action = action
+
+
+class Bounds:
+    # The relaxed game's value of a cent and of a unit of each product, for every
+    # town, at the start of a turn with some days left. With none left only cash
+    # counts. On the default map only days_left = duration - turn is ever reached.
+    def __init__(self, prices, costs, one_day_everywhere):
+        self.duration = len(prices)
+        town_count = len(prices[0])
+        product_count = len(prices[0][0])
+        self.done = (np.ones(town_count), np.zeros((town_count, product_count)))
+        self.values = {}
+        self.rows = {}
+        prices = np.array(prices, dtype=np.float64)
+        if one_day_everywhere:
+            self.roads = [(1, None)]
+            for turn in range(self.duration - 1, -1, -1):
+                days_left = self.duration - turn
+                cash_after, units_after = self.at(turn + 1, days_left - 1)
+                cash = np.full(town_count, cash_after.max())
+                units = np.broadcast_to(units_after.max(axis=0), units_after.shape).copy()
+                self.values[turn, days_left] = self.trade(prices[turn], cash, units, cash_after, units_after)
+            return
+        costs = np.array([[-1 if cost is None else cost for cost in row] for row in costs])
+        self.roads = [(cost, costs == cost) for cost in np.unique(costs[costs > 0]).tolist()]
+        # On a map every days left is worked out at once: row d of a turn's arrays is d days left
+        cash_after = self.done[0][None]
+        units_after = self.done[1][None]
+        towns = np.arange(town_count)
+        for turn in range(self.duration - 1, -1, -1):
+            days = self.duration - turn + 1  # 0 to duration - turn days left
+            # Each trip arrives with d - cost days left, and the best town the roads reach counts
+            arrive = np.arange(days)[:, None, None] - costs  # [d, from, to]
+            reached = (arrive >= 0) & (costs > 0)
+            arrive = np.where(reached, arrive, 0)
+            cash = np.where(reached, cash_after[arrive, towns], -np.inf).max(axis=2)
+            units = np.where(reached[..., None], units_after[arrive, towns], -np.inf).max(axis=2)
+            cash[0], units[0] = self.done
+            cash[1:], units[1:] = self.trade(prices[turn], cash[1:], units[1:], cash_after, units_after)
+            for days_left in range(1, days):
+                self.values[turn, days_left] = (cash[days_left], units[days_left])
+            cash_after, units_after = cash, units
+
+    @staticmethod
+    def trade(today, cash, units, cash_after, units_after):
+        # Buying turns a cent into 1/price units; selling turns a unit into price cents
+        bought = np.divide(units_after, today, out=np.zeros_like(units_after), where=today > 0)
+        return np.maximum(cash, bought.max(axis=-1)), np.maximum(units, today * cash_after[..., None])
+
+    def at(self, turn, days_left):
+        if days_left == 0:
+            return self.done
+        return self.values[turn, days_left]
+
+    def row(self, turn, days_left, town):
+        # (cent value, unit values) for one town as Python floats
+        key = (turn, days_left, town)
+        row = self.rows.get(key)
+        if row is None:
+            cash, units = self.at(turn, days_left)
+            row = self.rows[key] = (float(cash[town]), units[town].tolist())
+        return row
+
+    def worth(self, turn, days_left, town, step):
+        cash_value, unit_values = self.row(turn, days_left, town)
+        return step.cash * cash_value + sum(map(operator.mul, step.units, unit_values))
+
+    def best_trip(self, turn, days_left, town, step):
+        # (bound, town, days left on arrival) of the trip with the best bound for step, staying put included
+        units = np.array(step.units, dtype=np.float64)
+        best = (-np.inf, town, days_left - 1)
+        for cost, road in self.roads:
+            if cost <= days_left:
+                cash_values, unit_values = self.at(turn + 1, days_left - cost)
+                bounds = step.cash * cash_values + unit_values @ units
+                if road is not None:
+                    bounds = np.where(road[town], bounds, -np.inf)
+                other = int(bounds.argmax())
+                if bounds[other] > best[0]:
+                    best = (float(bounds[other]), other, days_left - cost)
+        return best
+
+
+def prune(steps, bounds, turn, days_left, town, floor):
+    # Keep the steps whose bound reaches floor and that no other step beats
+    cash_value, unit_values = bounds.row(turn, days_left, town)
+    floor -= abs(floor) * CASH_SLACK
+    return undominated([step for step in steps
+                        if step.cash * cash_value + sum(map(operator.mul, step.units, unit_values)) >= floor])
+
+
+def undominated(steps):
+    # Keep the steps no other step beats on cash and on every product
+    steps.sort(key=lambda step: (step.cash, step.units), reverse=True)  # A step's betters come before it
+    kept = []
+    for step in steps:
+        units = step.units
+        if not any(all(map(operator.ge, other.units, units)) for other in kept):
+            kept.append(step)
+    return kept
+
+
+def quantities(most, base, gain, floor):
+    # The quantities 1..most whose bound base + quantity x gain reaches floor
+    floor -= abs(floor) * CASH_SLACK
+    if gain > 0:
+        return range(max(1, math.ceil((floor - base) / gain)), most + 1)
+    if gain < 0:
+        return range(1, min(most, math.floor((base - floor) / -gain)) + 1)
+    return range(1, most + 1) if base >= floor else range(0)
+
+
+def trades(step, today, worth_after, floor):
+    # Every buy and sell of step at today's prices that can still reach floor
+    cash_value, unit_values = worth_after
+    cash = step.cash
+    units = step.units
+    base = cash * cash_value + sum(map(operator.mul, units, unit_values))
+    for product, price in enumerate(today):
+        if 0 < price <= cash:
+            for quantity in quantities(cash // price, base, unit_values[product] - price * cash_value, floor):
+                held = units[:product] + (units[product] + quantity,) + units[product + 1:]
+                yield Step(cash - quantity * price, held, step, ("buy", product, quantity))
+        if units[product]:
+            for quantity in quantities(units[product], base, price * cash_value - unit_values[product], floor):
+                held = units[:product] + (units[product] - quantity,) + units[product + 1:]
+                yield Step(cash + quantity * price, held, step, ("sell", product, quantity))
+
+
+def rollout(prices, bounds, step, turn, days_left, town):
+    # A quick way to finish from step for the floor: each turn, the move with the best bound,
+    # trading all in or all out
+    for turn in range(turn, len(prices)):
+        if days_left == 0:
+            break
+        worth, other, arrival = bounds.best_trip(turn, days_left, town, step)
+        move = (worth, Step(step.cash, step.units, step, ("travel", other)), arrival, other)
+        units = step.units
+        for product, price in enumerate(prices[turn][town]):
+            moves = []
+            if 0 < price <= step.cash:
+                quantity = step.cash // price
+                held = units[:product] + (units[product] + quantity,) + units[product + 1:]
+                moves.append(Step(step.cash - quantity * price, held, step, ("buy", product, quantity)))
+            if units[product]:
+                held = units[:product] + (0,) + units[product + 1:]
+                moves.append(Step(step.cash + units[product] * price, held, step, ("sell", product, units[product])))
+            for trade in moves:
+                worth = bounds.worth(turn + 1, days_left - 1, town, trade)
+                if worth > move[0]:
+                    move = (worth, trade, days_left - 1, town)
+        _, step, days_left, town = move
+    return step
+
+
+def solve(prices, starting_money=1000000, start_town=0, world_map=None):
+    # prices[turn][town][product] and money in cents; returns (money, plan).
+    # A turn is one action. Buying and selling take a day and travel takes the
+    # route's days (world_map; by default every town is a day from every other),
+    # so the game ends when len(prices) days are used up, possibly in fewer turns.
+    duration = len(prices)
+    towns = range(len(prices[0]))
+    # Days each trip uses; staying put counts as a day's wait
+    costs = [[1 if a == b else world_map.travel_days(a, b) if world_map else 1 for b in towns] for a in towns]
+    one_day_everywhere = all(cost == 1 for row in costs for cost in row)
+    bounds = Bounds(prices, costs, one_day_everywhere)
+    start = Step(starting_money, (0,) * len(prices[0][0]), None, None)
+    best = None
+    states = {(duration, start_town): [start]}
+    for turn in range(duration):
+        if not states:
+            break  # Every way has used up its days, or can't beat the floor
+        # Finishing quickly from the most promising way raises the floor, which
+        # matters most late in the game, when a unit more or less barely moves a bound
+        days_left, town, step = max(((days_left, town, step) for (days_left, town), steps in states.items() for step in steps),
+                                    key=lambda way: bounds.worth(turn, *way))
+        finish = rollout(prices, bounds, step, turn, days_left, town)
+        if best is None or finish.cash > best.cash:
+            best = finish
+        floor = best.cash
+        day_prices = prices[turn]
+        reached = {}
+        travellers = {}
+        arrivals = {}
+        for (days_left, town), steps in states.items():
+            after = days_left - 1
+            if one_day_everywhere:
+                travellers.setdefault(after, []).extend(steps)
+            else:
+                for other in towns:
+                    cost = costs[town][other]
+                    if cost is not None and cost <= days_left:
+                        arrivals.setdefault((days_left - cost, other), []).extend(steps)
+            worth_after = bounds.row(turn + 1, after, town)
+            trading = reached.setdefault((after, town), [])
+            for step in steps:
+                trading.extend(trades(step, day_prices[town], worth_after, floor))
+        # On a map where every trip is a day, travel merges each position across all towns at once
+        for after, steps in travellers.items():
+            steps = undominated(steps)
+            for town in towns:
+                reached.setdefault((after, town), []).extend(
+                    Step(step.cash, step.units, step, ("travel", town)) for step in steps)
+        # Otherwise the ways arriving at a town on the same day, from wherever, are pruned
+        # together before they are made into steps, so few of them ever are
+        for (days_left, town), steps in arrivals.items():
+            if days_left:
+                steps = prune(steps, bounds, turn + 1, days_left, town, floor)
+            reached.setdefault((days_left, town), []).extend(
+                Step(step.cash, step.units, step, ("travel", town)) for step in steps)
+        states = {}
+        for (days_left, town), steps in reached.items():
+            if days_left == 0:
+                for step in steps:
+                    if step.cash > best.cash:
+                        best = step
+            else:
+                steps = prune(steps, bounds, turn + 1, days_left, town, floor)
+                if steps:
+                    states[days_left, town] = steps
+    return best.cash, plan(best)
+
+
+def plan(step):
+    actions = []
+    while step.parent is not None:
+        actions.append(step.action)
+        step = step.parent
+    actions.reverse()
+    return actions
+
+
+def price_schedule(seed, rules=None):
+    # The prices a headless core.Game seeded with seed shows each day; its
+    # market has a random stream of its own, so these match whatever the policy does
+    rules = rules or Rules()
+    rng = Stream.for_subsystem(seed, "market")
+    base_prices = [cents(rng.randint(rules.min_base_price, rules.max_base_price)) for _ in rules.product_names]
+    table = PriceTable(rules.town_names, rules.product_names, base_prices, rng)
+    towns = range(len(rules.town_names))
+    schedule = []
+    for _ in range(rules.duration):
+        table.update_prices()
+        schedule.append([list(table.prices(town)) for town in towns])
+    return schedule
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Most money a perfect player can make with a fixed price schedule.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duration", type=int, default=90)
+    parser.add_argument("--starting-money", type=float, default=10000)
+    parser.add_argument("--towns", type=int, default=len(Rules().town_names))
+    parser.add_argument("--map", help="JSON map of towns and roads (see maps/); replaces --towns")
+    parser.add_argument("--products", type=int, default=len(Rules().product_names))
+    parser.add_argument("--plan", action="store_true", help="print the optimal actions")
+    args = parser.parse_args()
+
+    defaults = Rules()
+    town_names = [defaults.town_names[i] if i < len(defaults.town_names) else f"Town {i}" for i in range(args.towns)]
+    product_names = [defaults.product_names[i] if i < len(defaults.product_names) else f"Product {i}"
+                     for i in range(args.products)]
+    world_map = WorldMap.load(args.map) if args.map else None
+    rules = Rules(duration=args.duration, starting_money=args.starting_money,
+                  town_names=town_names, product_names=product_names, world_map=world_map)
+    schedule = price_schedule(args.seed, rules)
+    start = time.perf_counter()
+    money, actions = solve(schedule, cents(rules.starting_money), world_map=world_map)
+    elapsed = time.perf_counter() - start
+    if args.plan:
+        for turn, action in enumerate(actions):
+            print(f"Turn {turn + 1}: {' '.join(str(part) for part in action)}")
+    print(f"Best possible money after {args.duration} days: ${money / 100:,.2f}")
+    print(f"Solved {len(rules.town_names)} towns x {args.products} products in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from array import array
+
+from history import PriceHistory, DEFAULT_WINDOW
+
+# Every town's prices in one place. A PriceTable holds the base price of each
+# product and a PriceHistory (history.py) of every (town, product) pair, laid
+# out town by town, so a whole map of prices is one int64 ring: 64 bytes per
+# town-product with the default week, the current and previous prices and the
+# last week of history included. A new day is drawn for every town at once,
+# town by town and product by product, the order the markets have always
+# drawn in, so a seed gives the same prices it always did.
+#
+# Games see the table through TownPrices and ProductPrices, small views made
+# when they are needed that read and write nothing of their own. The front
+# ends subclass them to add their displays.
+
+
+class PriceTable:
+    def __init__(self, town_names, product_names, base_prices, rng, history=None, window=DEFAULT_WINDOW):
+        self.town_names = list(town_names)
+        self.product_names = list(product_names)
+        self.product_count = len(self.product_names)
+        self.base_prices = array('q', base_prices)  # Cents, one per product, the same in every town
+        self.rng = rng  # The game's market stream, see streams.py
+        if history is None:
+            self.history = PriceHistory(len(self.town_names) * self.product_count, window)
+            self.update_prices()  # The first day's prices
+        else:
+            self.history = history  # Restored from a snapshot, see snapshot.py
+
+    def update_prices(self):
+        uniform = self.rng.uniform
+        base_prices = self.base_prices
+        self.history.add(array('q', [round(base_price * uniform(0.8, 1.2))
+                                     for _ in self.town_names for base_price in base_prices]))
+
+    def cell(self, town, product):
+        return town * self.product_count + product
+
+    def current_price(self, town, product):
+        return self.history.latest(town * self.product_count + product)
+
+    def previous_price(self, town, product):
+        return self.history.previous(town * self.product_count + product)
+
+    def prices(self, town, back=0):
+        # A town's prices back days ago as a tuple, one per product
+        start = self.history.row(back) + town * self.product_count
+        return tuple(self.history.ring[start:start + self.product_count])
+
+    def towns(self, town_class=None):
+        town_class = town_class or TownPrices
+        return [town_class(self, index) for index in range(len(self.town_names))]
+
+    def memory_size(self):
+        return self.base_prices.buffer_info()[1] * self.base_prices.itemsize + self.history.memory_size()
+
+
+class ProductPrices:
+    # One product in one town, read from the town's PriceTable; usable where a Product is expected
+    __slots__ = ("town", "id")
+
+    def __init__(self, town, id):
+        self.town = town
+        self.id = id  # Position in the product list, used to index the player's inventory
+
+    @property
+    def name(self):
+        return self.town.table.product_names[self.id]
+
+    @property
+    def base_price(self):
+        return self.town.table.base_prices[self.id]
+
+    @property
+    def current_price(self):
+        return self.town.table.current_price(self.town.index, self.id)
+
+    @property
+    def previous_price(self):
+        return self.town.table.previous_price(self.town.index, self.id)
+
+    def price_change_percentage(self):
+        previous_price = self.previous_price
+        if previous_price == 0:
+            return 0
+        change = ((self.current_price - previous_price) / previous_price) * 100
+        return round(change, 2)
+
+    def summary(self):
+        # The last week of this price, for the trend shown next to it
+        table = self.town.table
+        return table.history.summary(table.cell(self.town.index, self.id))
+
+
+class TownPrices:
+    # A town's row of a PriceTable, usable where a Town is expected
+    __slots__ = ("table", "index")
+    product_class = ProductPrices
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def name(self):
+        return self.table.town_names[self.index]
+
+    @property
+    def products(self):
+        return [self.product_class(self, id) for id in range(self.table.product_count)]
+
+    def prices(self):
+        return self.table.prices(self.index)
+
+    def previous_prices(self):
+        return self.table.prices(self.index, 1)
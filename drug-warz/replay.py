@@ -0,0 +1,136 @@
+import argparse
+import math
+import time
+
+from journal import (MAGIC, NAMES, RECORD, START, PRICE, BUY, SELL, ARRIVE, BRIBE, CAUGHT, END_DAY, QUIT)
+
+# Rebuilds a game from its journal without prompting for anything: the
+# journal already holds every roll and choice, the prices the player was
+# shown, and the names of the towns and products it was played with. Stops at the start of any day, so a
+# crashed or disputed session can be inspected at any point.
+
+
+class ReplayState:
+    def __init__(self, town_names=(), product_names=()):
+        self.town_names = list(town_names)
+        self.product_names = list(product_names)
+        self.duration = 0
+        self.day = 0
+        self.days_left = 0
+        self.town = 0
+        self.money = 0  # Cents
+        self.inventory = {}
+        self.prices = {}  # Product -> cents, the last prices the player was shown
+        self.price_town = 0  # The town they were shown in
+        self.finished = False
+        self.events = 0
+
+    def report(self):
+        town_names = self.town_names
+        product_names = self.product_names
+        town = town_names[self.town] if self.town < len(town_names) else f"Town {self.town}"
+        if self.finished:
+            lines = [f"Game over after {self.day} of {self.duration} days in {town}"]
+        else:
+            lines = [f"Day {self.day + 1} of {self.duration} in {town}, {self.days_left} days left"]
+        lines.append(f"Money: ${self.money / 100:.2f}")
+        for product, quantity in sorted(self.inventory.items()):
+            if quantity:
+                name = product_names[product] if product < len(product_names) else f"Product {product}"
+                lines.append(f"{name}: {quantity}")
+        if self.prices:
+            price_town = town_names[self.price_town] if self.price_town < len(town_names) else f"Town {self.price_town}"
+            lines.append(f"Prices in {price_town}:")
+            for product, price in sorted(self.prices.items()):
+                name = product_names[product] if product < len(product_names) else f"Product {product}"
+                lines.append(f"  {name}: ${price / 100:.2f}")
+        return "\n".join(lines)
+
+
+def read_journal(path):
+    # Returns (town names, product names, records)
+    with open(path, "rb") as journal:
+        data = journal.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a Dope Warz journal from this version")
+    offset = len(MAGIC)
+    names = []
+    for _ in range(2):
+        (size,) = NAMES.unpack_from(data, offset)
+        offset += NAMES.size
+        text = data[offset:offset + size].decode()
+        names.append(text.split("\n") if text else [])
+        offset += size
+    body = memoryview(data)[offset:]
+    # A crash can leave half a record at the end; it is dropped
+    usable = len(body) - len(body) % RECORD.size
+    return names[0], names[1], RECORD.iter_unpack(body[:usable])
+
+
+def replay(path, until_day=None):
+    # Applies every turn that starts before until_day (1-based); None replays it all.
+    # Every record of a turn carries the day it starts on except its END_DAY, so a
+    # trip of several days is applied whole, and until_day on the road stops on arrival.
+    town_names, product_names, records = read_journal(path)
+    state = ReplayState(town_names, product_names)
+    prices = state.prices
+    inventory = state.inventory
+    money = 0
+    town = 0
+    stop_at = until_day - 1 if until_day else math.inf  # The first 0-based day not to apply
+    events = 0
+    for kind, day, a, b, value in records:
+        if day >= stop_at and kind != START and kind != END_DAY:
+            break
+        events += 1
+        if kind == PRICE:
+            prices[b] = int(value)
+            state.price_town = a
+        elif kind == END_DAY:
+            state.days_left = a
+            state.day = day + 1
+        elif kind == BUY:
+            money -= int(value) * b
+            inventory[a] = inventory.get(a, 0) + b
+        elif kind == SELL:
+            money += int(value) * b
+            inventory[a] = inventory.get(a, 0) - b
+        elif kind == ARRIVE:
+            town = a
+        elif kind == BRIBE:
+            money -= b
+        elif kind == CAUGHT:
+            money -= round(money * value)  # As Player.lose takes it
+            for product in inventory:
+                inventory[product] -= int(inventory[product] * value)
+        elif kind == START:
+            state.duration = state.days_left = a
+            money = b
+            town = 0
+            prices.clear()
+            inventory.clear()
+        elif kind == QUIT:
+            state.finished = True
+    state.money = money
+    state.town = town
+    state.events = events
+    if state.days_left == 0 and state.duration:
+        state.finished = True
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a Dope Warz journal.")
+    parser.add_argument("journal")
+    parser.add_argument("--day", type=int, default=None, help="stop at the start of this day")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    state = replay(args.journal, args.day)
+    elapsed = time.perf_counter() - start
+    print(state.report())
+    print(f"Replayed {state.events:,} events in {elapsed * 1000:.1f} ms ({state.events / max(elapsed, 1e-9):,.0f} events/sec)")
+
+
+if __name__ == "__main__":
+    main()
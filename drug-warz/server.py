@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+
+from core import Rules, Player, cents
+from prices import PriceTable
+from streams import Stream, new_seed
+from world_map import WorldMap
+
+# Multiplayer server. Players connect over TCP and send the same commands
+# Game.start asks for, one per line. Every world has one market that all of its
+# players trade in, and a single asyncio event loop serves every connection.
+#
+#   look                  prices, inventory and days left (free)
+#   travel TOWN           0-based town number, as in Game.travel
+#   buy PRODUCT QUANTITY  1-based product number, as in Game.buy
+#   sell PRODUCT QUANTITY
+#   fight | run | bribe AMOUNT   answer an encounter
+#   join WORLD            move to another world before the first action
+#   new [DAYS]            start a new game
+#   quit
+#
+# Each command gets exactly one line back starting with OK, ERR, ENCOUNTER or
+# GAMEOVER. buy and sell use up a day and travel the days its route takes on
+# the world map, like in Game.start.
+
+MAX_LINE = 1024
+HELP = "commands: look, travel TOWN, buy PRODUCT QUANTITY, sell PRODUCT QUANTITY, fight, run, bribe AMOUNT, join WORLD, new [DAYS], quit"
+
+
+class World:
+    def __init__(self, number, rules, seed=None):
+        self.number = number
+        self.rules = rules
+        self.seed = new_seed() if seed is None else seed
+        self.rng = Stream.for_subsystem(self.seed, "market")
+        self.day = 0
+        base_prices = [cents(self.rng.randint(rules.min_base_price, rules.max_base_price)) for _ in rules.product_names]
+        self.price_table = PriceTable(rules.town_names, rules.product_names, base_prices, self.rng)
+        self.towns = self.price_table.towns()
+
+    def update_prices(self):
+        self.day += 1
+        self.price_table.update_prices()
+
+
+class Session:
+    def __init__(self, world, rng):
+        self.rng = rng
+        self.join(world)
+        self.new_game(world.rules.duration)
+
+    def join(self, world):
+        self.world = world
+        self.town_index = 0
+        self.current_town = world.towns[0]
+
+    def new_game(self, days):
+        self.days_left = days
+        self.player = Player(self.world.rules.product_names, cents(self.world.rules.starting_money))
+        self.town_index = 0
+        self.current_town = self.world.towns[0]
+        self.encounter = None
+        self.destination = None
+        self.started = False
+
+    def handle(self, line):
+        words = line.split()
+        if not words:
+            return "ERR empty command"
+        command, args = words[0].lower(), words[1:]
+        try:
+            if self.encounter:
+                return self.answer_encounter(command, args)
+            if command == "look":
+                return self.look()
+            if command == "travel":
+                return self.travel(int(args[0]))
+            if command == "buy":
+                return self.trade(self.player.buy_product, int(args[0]) - 1, int(args[1]), "Bought")
+            if command == "sell":
+                return self.trade(self.player.sell_product, int(args[0]) - 1, int(args[1]), "Sold")
+            if command == "new":
+                days = int(args[0]) if args else self.world.rules.duration
+                if days <= 0:
+                    return f"ERR bad arguments for {command}"
+                self.new_game(days)
+                return f"OK New game with {self.days_left} days"
+            if command == "quit":
+                return self.game_over()
+        except (IndexError, ValueError):
+            return f"ERR bad arguments for {command}"
+        return f"ERR unknown command; {HELP}"
+
+    def look(self):
+        prices = ",".join(f"{product.name}:{product.current_price / 100:.2f}" for product in self.current_town.products)
+        inventory = ",".join(f"{name}:{quantity}" for name, quantity in self.player.holdings())
+        return (f"OK world={self.world.number} day={self.world.day} town={self.current_town.name} "
+                f"days_left={self.days_left} money={self.player.money / 100:.2f} prices={prices} inventory={inventory}")
+
+    def end_day(self, message, days=1):
+        self.started = True
+        self.days_left -= days
+        if self.days_left <= 0:
+            return self.game_over(message + ". ")
+        return "OK " + message
+
+    def game_over(self, message=""):
+        self.days_left = 0
+        return f"GAMEOVER {message}You ended with ${self.player.money / 100:.2f}"
+
+    def trade(self, trade, product_number, quantity, verb):
+        if self.days_left <= 0:
+            return "ERR game over; send new to play again"
+        products = self.current_town.products
+        if not 0 <= product_number < len(products) or quantity <= 0:
+            return "ERR Product not found."
+        product = products[product_number]
+        if not trade(product, quantity):
+            return "ERR Not enough money." if verb == "Bought" else "ERR Not enough inventory."
+        return self.end_day(f"{verb} {quantity} of {product.name}")
+
+    def travel(self, choice):
+        if self.days_left <= 0:
+            return "ERR game over; send new to play again"
+        if not 0 <= choice < len(self.world.towns):
+            return "ERR Invalid choice."
+        days = self.world.rules.world_map.travel_days(self.town_index, choice)
+        if days is None or days > self.days_left:
+            return f"ERR You can't reach {self.world.towns[choice].name} in the days you have left."
+        self.destination = choice
+        return self.continue_travel(list(self.world.rules.encounters.types))
+
+    def continue_travel(self, remaining):
+        table = self.world.rules.encounters
+        while remaining:
+            type = remaining.pop(0)
+            if self.rng.random() < table.chance(type):
+                self.encounter = (type, remaining)
+                return f"ENCOUNTER {type}; fight, run or bribe AMOUNT"
+        days = self.world.rules.world_map.travel_days(self.town_index, self.destination)
+        self.town_index = self.destination
+        self.current_town = self.world.towns[self.destination]
+        return self.end_day(f"Traveled to {self.current_town.name}", max(days, 1))
+
+    def answer_encounter(self, command, args):
+        type, remaining = self.encounter
+        table = self.world.rules.encounters
+        escape_chance = table.escape_chance(type, command)
+        if command == "bribe":
+            bribe_amount = int(args[0]) * 100  # Typed in dollars
+            if bribe_amount <= 0:
+                return f"ERR bad arguments for {command}"
+            if bribe_amount <= self.player.money:
+                self.player.money -= bribe_amount
+            else:
+                escape_chance = 0.0
+        if escape_chance and self.rng.random() < escape_chance:
+            self.encounter = None
+            return self.continue_travel(remaining)
+        self.encounter = None
+        loss_money, lost = self.player.lose(table.loss_fraction)
+        items = "".join(f", {quantity} {name}" for name, quantity in zip(self.player.product_names, lost) if quantity)
+        return self.end_day(f"You were caught by the {type}! You lost ${loss_money / 100:.2f}{items}")
+
+
+class Connection(asyncio.Protocol):
+    # One per player. A plain Protocol rather than a stream reader/writer pair
+    # keeps the per-command cost low with thousands of sockets open.
+
+    def __init__(self, server):
+        self.server = server
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.session = Session(self.server.worlds[0], self.server.next_stream())
+        self.server.sessions += 1
+        transport.write(f"WELCOME world=0 days={self.session.days_left}; {HELP}\n".encode())
+
+    def data_received(self, data):
+        lines = (self.buffer + data).split(b"\n")
+        self.buffer = lines.pop()
+        if len(self.buffer) > MAX_LINE:
+            self.transport.close()
+            return
+        responses = []
+        quitting = False
+        for line in lines:
+            text = line.decode(errors="replace").strip()
+            if text.lower().startswith("join "):
+                responses.append(self.server.join(self.session, text.split()[1]))
+            else:
+                responses.append(self.session.handle(text))
+            if text.lower() == "quit":
+                quitting = True
+                break
+        if responses:
+            self.transport.write(("\n".join(responses) + "\n").encode())
+        if quitting:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        self.server.sessions -= 1
+
+
+class Server:
+    def __init__(self, worlds, day_length=1.0, seed=None):
+        self.worlds = worlds
+        self.day_length = day_length
+        self.seed = new_seed() if seed is None else seed
+        self.sessions = 0
+        self.connections = 0
+
+    def next_stream(self):
+        # Connection n rolls its encounters from seed + n's encounter stream
+        self.connections += 1
+        return Stream.for_subsystem(self.seed + self.connections, "encounters")
+
+    def join(self, session, world):
+        if session.started:
+            return "ERR join before your first action"
+        try:
+            session.join(self.worlds[int(world)])
+        except (IndexError, ValueError):
+            return f"ERR worlds are 0 to {len(self.worlds) - 1}"
+        return f"OK joined world {world}"
+
+    async def run_market(self):
+        while True:
+            await asyncio.sleep(self.day_length)
+            for world in self.worlds:
+                world.update_prices()
+
+    async def serve(self, host, port):
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(lambda: Connection(self), host, port, backlog=4096)
+        market = asyncio.create_task(self.run_market())
+        print(f"Serving {len(self.worlds)} world(s) on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            market.cancel()
+
+
+def raise_file_limit():
+    # Every session is a socket; the default limit of 1024 is too low for 10k players
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Dope Warz games over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--worlds", type=int, default=1)
+    parser.add_argument("--duration", type=int, default=45)
+    parser.add_argument("--day-length", type=float, default=1.0, help="seconds between market price updates")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--map", help="JSON map of towns and roads (see maps/)")
+    args = parser.parse_args()
+
+    raise_file_limit()
+    rules = Rules(duration=args.duration, world_map=WorldMap.load(args.map) if args.map else None)
+    seed = new_seed() if args.seed is None else args.seed
+    worlds = [World(i, rules, seed + i) for i in range(args.worlds)]
+    server = Server(worlds, args.day_length, seed)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import contextlib
+import math
+import multiprocessing
+import time
+from array import array
+
+from core import Game, Rules, POLICIES, DURATIONS, cents
+from encounters import EncounterTable
+from leaderboard import Leaderboard
+from world_map import WorldMap
+
+# Batch runner: plays complete headless games across every core and reports
+# throughput plus aggregate outcomes, for tuning the game balance. Game n of a
+# batch plays on seed + n whichever worker gets it, and the totals are whole
+# cents, so a batch reports the same numbers on one core or many.
+
+
+class Stats:
+    # Money is counted in cents
+    def __init__(self, starting_money=0):
+        self.starting_money = starting_money
+        self.games = 0
+        self.total = 0
+        self.total_squared = 0
+        self.lowest = math.inf
+        self.highest = -math.inf
+        self.profitable = 0
+        self.busted = 0
+        self.encounters = 0
+        self.failures = 0
+
+    def add(self, game):
+        money = game.player.money
+        self.games += 1
+        self.total += money
+        self.total_squared += money * money
+        self.lowest = min(self.lowest, money)
+        self.highest = max(self.highest, money)
+        if money > self.starting_money:
+            self.profitable += 1
+        if money < 100:
+            self.busted += 1
+        self.encounters += game.encounters
+        self.failures += game.failures
+
+    def merge(self, other):
+        self.games += other.games
+        self.total += other.total
+        self.total_squared += other.total_squared
+        self.lowest = min(self.lowest, other.lowest)
+        self.highest = max(self.highest, other.highest)
+        self.profitable += other.profitable
+        self.busted += other.busted
+        self.encounters += other.encounters
+        self.failures += other.failures
+
+    def mean(self):
+        return self.total / self.games if self.games else 0.0
+
+    def variance(self):
+        # Exact in integers until the last division, however close together the scores are
+        games = self.games
+        if games < 2:
+            return 0.0
+        return (games * self.total_squared - self.total * self.total) / (games * (games - 1))
+
+    def stdev(self):
+        return math.sqrt(self.variance())
+
+    def report(self):
+        if not self.games:
+            return "No games played."
+        lines = [
+            f"Games: {self.games}",
+            f"Mean money: ${self.mean() / 100:.2f} (stdev ${self.stdev() / 100:.2f})",
+            f"Min/max money: ${self.lowest / 100:.2f} / ${self.highest / 100:.2f}",
+            f"Profitable: {100 * self.profitable / self.games:.2f}%",
+            f"Busted: {100 * self.busted / self.games:.2f}%",
+            f"Encounters per game: {self.encounters / self.games:.2f}",
+            f"Caught per game: {self.failures / self.games:.2f}",
+        ]
+        return "\n".join(lines)
+
+
+def run_chunk(args):
+    rules, policy_name, first_seed, count, keep_scores = args
+    policy = POLICIES[policy_name]()
+    stats = Stats(cents(rules.starting_money))
+    scores = array('q') if keep_scores else None  # Final money in cents, seed by seed
+    for seed in range(first_seed, first_seed + count):
+        game = Game(policy, rules, seed)
+        game.start()
+        stats.add(game)
+        if scores is not None:
+            scores.append(game.player.money)
+    return stats, first_seed, scores
+
+
+def run_batch(rules, policy_name="random", games=10000, workers=None, seed=0, chunk_size=1000, leaderboard=None):
+    # With a leaderboard, every game's result goes in, one transaction per chunk
+    chunks = []
+    for first in range(0, games, chunk_size):
+        chunks.append((rules, policy_name, seed + first, min(chunk_size, games - first), leaderboard is not None))
+    stats = Stats(cents(rules.starting_money))
+    name = f"{policy_name} bot"
+    with multiprocessing.Pool(workers) as pool:
+        for chunk_stats, first_seed, scores in pool.imap(run_chunk, chunks):
+            stats.merge(chunk_stats)
+            if leaderboard is not None:
+                leaderboard.add_many((name, rules.duration, first_seed + i, score) for i, score in enumerate(scores))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Dope Warz games without a human at the keyboard.")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--duration", type=int, default=45, help=f"days per game, e.g. {DURATIONS}")
+    parser.add_argument("--starting-money", type=float, default=10000)
+    parser.add_argument("--encounter-chance", type=float, default=0.3)
+    parser.add_argument("--escape-chance", type=float, default=0.5)
+    parser.add_argument("--loss-fraction", type=float, default=0.1)
+    parser.add_argument("--encounters", help="JSON encounter table; replaces the three chances above")
+    parser.add_argument("--map", help="JSON map of towns and roads (see maps/)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--leaderboard", help="SQLite leaderboard to record every game in (see leaderboard.py)")
+    args = parser.parse_args()
+
+    rules = Rules(duration=args.duration, starting_money=args.starting_money,
+                  encounter_chance=args.encounter_chance, escape_chance=args.escape_chance,
+                  loss_fraction=args.loss_fraction,
+                  encounters=EncounterTable.load(args.encounters) if args.encounters else None,
+                  world_map=WorldMap.load(args.map) if args.map else None)
+    leaderboard = Leaderboard(args.leaderboard) if args.leaderboard else None
+    start = time.perf_counter()
+    with leaderboard.bulk(args.games) if leaderboard else contextlib.nullcontext():
+        stats = run_batch(rules, args.policy, args.games, args.workers, args.seed, args.chunk_size, leaderboard)
+    elapsed = time.perf_counter() - start
+    print(stats.report())
+    print(f"Elapsed: {elapsed:.2f}s ({stats.games / elapsed:,.0f} games/sec)")
+    if leaderboard is not None:
+        print(f"Leaderboard {args.leaderboard}: {leaderboard.count(args.duration):,} {args.duration}-day games")
+        leaderboard.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import math
+import os
+import struct
+from array import array
+
+import numpy as np
+
+from core import Game, GameView, Rules, Player
+from encounters import EncounterTable
+from history import PriceHistory
+from prices import PriceTable
+from streams import Stream, stream_key
+from world_map import WorldMap
+
+# Saved games in a fixed binary layout. A snapshot file is a header, a table
+# of named arrays (name, dtype, shape, offset) and then the raw bytes of each
+# array, every one starting on a 64-byte boundary:
+#
+#   "DWS\x03" | array count | table entries | padding | array | padding | array ...
+#
+# Reading one maps the file and hands out NumPy views straight into it, so
+# nothing is parsed or unpickled: opening a 10,000-town world costs about
+# the same as opening a 4-town one, and a batch of simulated games can be
+# looked at (money, inventory, prices) without building a single Game.
+#
+# Two kinds of snapshot are written. save_games/load_games store any number
+# of headless core.Games that share their Rules, for pausing batch runs.
+# save_session/restore_session store one game from a front end, including
+# the price history and the random streams, so a resumed game carries on
+# exactly where it stopped. A random stream (streams.py) is saved as the game's
+# seed and how many numbers it has drawn; money and prices are int64 cents.
+
+MAGIC = b"DWS\x03"
+HEADER = struct.Struct("<4sI")        # magic, number of arrays
+ENTRY = struct.Struct("<32s8sB3xqqqq")  # name, dtype, dimensions, shape (up to 3), offset
+ALIGN = 64
+
+SAVE_DIR = "saves"
+
+
+def save_path(user_name, directory=SAVE_DIR):
+    safe_name = "".join(c for c in user_name or "player" if c.isalnum()) or "player"
+    return os.path.join(directory, f"{safe_name}.dws")
+
+
+def write_arrays(path, arrays):
+    # arrays maps names to NumPy arrays of up to three dimensions
+    arrays = {name: np.ascontiguousarray(value) for name, value in arrays.items()}
+    offset = HEADER.size + ENTRY.size * len(arrays)
+    entries = []
+    for name, value in arrays.items():
+        if value.ndim > 3:
+            raise ValueError(f"{name} has {value.ndim} dimensions; snapshots hold at most 3")
+        offset += -offset % ALIGN
+        shape = list(value.shape) + [0] * (3 - value.ndim)
+        entries.append(ENTRY.pack(name.encode(), value.dtype.str.encode(), value.ndim, *shape, offset))
+        offset += value.nbytes
+    # Written next to the old save and swapped in, so a crash never leaves half a file
+    partial = path + ".partial"
+    with open(partial, "wb") as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, len(arrays)))
+        for entry in entries:
+            snapshot_file.write(entry)
+        for value in arrays.values():
+            snapshot_file.write(bytes(-snapshot_file.tell() % ALIGN))
+            snapshot_file.write(memoryview(value.reshape(-1)).cast("B"))
+    os.replace(partial, path)
+
+
+class Snapshot:
+    # Read-only arrays mapped from a snapshot file; snapshot["games/money"] and so on
+    def __init__(self, path):
+        self.path = path
+        # Plain ndarray views of the mapping, which index faster than np.memmap ones
+        self.data = np.memmap(path, dtype=np.uint8, mode="r").view(np.ndarray)
+        magic, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Dope Warz snapshot")
+        self.arrays = {}
+        for i in range(count):
+            name, dtype, ndim, a, b, c, offset = ENTRY.unpack_from(self.data, HEADER.size + i * ENTRY.size)
+            dtype = np.dtype(dtype.rstrip(b"\0").decode())
+            shape = (a, b, c)[:ndim]
+            size = dtype.itemsize * math.prod(shape)
+            self.arrays[name.rstrip(b"\0").decode()] = self.data[offset:offset + size].view(dtype).reshape(shape)
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def strings(self, name):
+        return unpack_strings(self.arrays[name + "/text"], self.arrays[name + "/ends"])
+
+    def close(self):
+        # Drops the mapping; on Windows the file can't be replaced while it is open
+        self.arrays = {}
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pack_strings(name, strings, arrays):
+    # A list of strings as one block of UTF-8 and the offset where each one ends
+    encoded = [string.encode() for string in strings]
+    arrays[name + "/text"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    arrays[name + "/ends"] = np.cumsum([len(string) for string in encoded], dtype=np.int64)
+
+
+def unpack_strings(text, ends):
+    text = text.tobytes()
+    strings = []
+    start = 0
+    for end in ends.tolist():
+        strings.append(text[start:end].decode())
+        start = end
+    return strings
+
+
+def pack_world_map(world_map, arrays):
+    pack_strings("map/towns", world_map.town_names, arrays)
+    arrays["map/offsets"] = np.frombuffer(world_map.offsets, dtype=np.int64)
+    arrays["map/neighbors"] = np.frombuffer(world_map.neighbors, dtype=np.int64)
+    arrays["map/days"] = np.frombuffer(world_map.days, dtype=np.int64)
+
+
+def unpack_world_map(snapshot):
+    return WorldMap.from_arrays(snapshot.strings("map/towns"), snapshot["map/offsets"],
+                                snapshot["map/neighbors"], snapshot["map/days"])
+
+
+def pack_encounters(table, arrays):
+    responses = sorted({response for _, _, escapes in table.rows for response in escapes})
+    pack_strings("encounters/types", table.types, arrays)
+    pack_strings("encounters/responses", responses, arrays)
+    arrays["encounters/chances"] = np.array([chance for _, chance, _ in table.rows], dtype=np.float64)
+    # nan where a type has no such response
+    arrays["encounters/escapes"] = np.array([[escapes.get(response, math.nan) for response in responses]
+                                             for _, _, escapes in table.rows], dtype=np.float64).reshape(-1, len(responses))
+    arrays["encounters/loss_fraction"] = np.array([table.loss_fraction])
+
+
+def unpack_encounters(snapshot):
+    responses = snapshot.strings("encounters/responses")
+    rows = []
+    for type, chance, escapes in zip(snapshot.strings("encounters/types"), snapshot["encounters/chances"].tolist(),
+                                     snapshot["encounters/escapes"].tolist()):
+        rows.append((type, chance, {response: escape for response, escape in zip(responses, escapes)
+                                    if not math.isnan(escape)}))
+    return EncounterTable(rows, float(snapshot["encounters/loss_fraction"][0]))
+
+
+def price_history(table):
+    # A PriceTable's ring as (days, towns x products)
+    history = table.history
+    return np.frombuffer(history.ring, dtype=np.int64).reshape(history.size + 1, history.series)
+
+
+def restore_price_table(town_names, product_names, base_prices, ring, count, rng):
+    # Rebuilds a PriceTable from its base prices and history ring without drawing a new day
+    history = PriceHistory(len(town_names) * len(product_names), ring.shape[0] - 1)
+    history.restore(ring.tobytes(), count)
+    return PriceTable(town_names, product_names, base_prices.tolist(), rng, history)
+
+
+RULE_NUMBERS = ["duration", "starting_money", "encounter_chance", "escape_chance", "loss_fraction",
+                "min_base_price", "max_base_price"]
+GAME_STATE = ["days_left", "town_index", "encounters", "failures", "quit"]
+GAME_STREAMS = [("market_rng", "market"), ("encounter_rng", "encounters"), ("policy_rng", "policy")]
+SESSION_STREAMS = GAME_STREAMS[:2]
+
+
+def save_games(path, games):
+    # Any number of core games played under the same Rules, stacked game by game
+    rules = games[0].rules
+    if any(game.rules is not rules for game in games):
+        raise ValueError("every game in a snapshot must share one Rules")
+    arrays = {}
+    arrays["rules/numbers"] = np.array([getattr(rules, name) for name in RULE_NUMBERS], dtype=np.float64)
+    pack_strings("rules/products", rules.product_names, arrays)
+    pack_encounters(rules.encounters, arrays)
+    pack_world_map(rules.world_map, arrays)
+    arrays["games/state"] = np.array([[getattr(game, name) for name in GAME_STATE] for game in games], dtype=np.int64)
+    arrays["games/money"] = np.array([game.player.money for game in games], dtype=np.int64)
+    arrays["games/inventory"] = np.array([game.player.inventory for game in games], dtype=np.int64)
+    arrays["games/base_prices"] = np.array([game.price_table.base_prices for game in games], dtype=np.int64)
+    arrays["games/price_history"] = np.array([price_history(game.price_table) for game in games])
+    arrays["games/price_days"] = np.array([game.price_table.history.count for game in games], dtype=np.int64)
+    arrays["games/seed"] = np.array([game.seed % 2 ** 64 for game in games], dtype=np.uint64)
+    arrays["games/streams"] = np.array([[getattr(game, name).position for name, _ in GAME_STREAMS] for game in games],
+                                       dtype=np.int64)
+    write_arrays(path, arrays)
+
+
+def load_rules(snapshot):
+    numbers = dict(zip(RULE_NUMBERS, snapshot["rules/numbers"].tolist()))
+    for name in ("duration", "min_base_price", "max_base_price"):
+        numbers[name] = int(numbers[name])
+    return Rules(product_names=snapshot.strings("rules/products"), encounters=unpack_encounters(snapshot),
+                 world_map=unpack_world_map(snapshot), **numbers)
+
+
+def load_games(path, policy, rules=None):
+    # Games come back ready to carry on with start(); they all play with policy
+    with Snapshot(path) as snapshot:
+        rules = rules or load_rules(snapshot)
+        state = snapshot["games/state"].tolist()
+        money = snapshot["games/money"].tolist()
+        inventory = snapshot["games/inventory"]
+        base_prices = snapshot["games/base_prices"]
+        histories = snapshot["games/price_history"]
+        price_days = snapshot["games/price_days"].tolist()
+        seeds = snapshot["games/seed"].tolist()
+        positions = snapshot["games/streams"].tolist()
+        games = []
+        for g in range(len(state)):
+            # Built around Game.__init__, which would roll a new world
+            game = Game.__new__(Game)
+            game.rules = rules
+            game.policy = policy
+            game.journal = None
+            game.seed = seeds[g]
+            for (name, subsystem), position in zip(GAME_STREAMS, positions[g]):
+                setattr(game, name, Stream(stream_key(game.seed, subsystem), position))
+            # A finished or quit game comes back as it was; start() plays no more days of it
+            days_left, town_index, encounters, failures, quit = state[g]
+            game.days_left = days_left
+            game.town_index = town_index
+            game.encounters = encounters
+            game.failures = failures
+            game.quit = bool(quit)
+            game.price_table = restore_price_table(rules.town_names, rules.product_names, base_prices[g],
+                                                   histories[g], price_days[g], game.market_rng)
+            game.towns = game.price_table.towns()
+            game.player = Player(rules.product_names, money[g])
+            game.player.inventory = array('q', inventory[g].tobytes())
+            game.current_town = game.towns[town_index]
+            game.view = GameView(game)
+            games.append(game)
+    return games
+
+
+def save_session(path, game):
+    # One game from drug_warz.py or drug_warz_2.py, with everything needed to carry on:
+    # the world, every town's prices and price history, the player, the journal and
+    # the random streams
+    arrays = {}
+    pack_strings("session/name", [game.user_name or "", game.journal.path], arrays)
+    arrays["session/days"] = np.array([game.duration, game.days_left, game.town_index], dtype=np.int64)
+    arrays["session/money"] = np.array([game.player.money], dtype=np.int64)
+    arrays["session/inventory"] = np.frombuffer(game.player.inventory, dtype=np.int64)
+    pack_strings("session/products", game.player.product_names, arrays)
+    pack_world_map(game.world_map, arrays)
+    arrays["prices/base_prices"] = np.frombuffer(game.price_table.base_prices, dtype=np.int64)
+    arrays["prices/history"] = price_history(game.price_table)
+    arrays["prices/days"] = np.array([game.price_table.history.count], dtype=np.int64)
+    arrays["session/seed"] = np.array([game.seed % 2 ** 64], dtype=np.uint64)
+    arrays["session/streams"] = np.array([getattr(game, name).position for name, _ in SESSION_STREAMS], dtype=np.int64)
+    write_arrays(path, arrays)
+
+
+def restore_session(path, game, town_class, player_class):
+    # Puts a saved session back into a front end's game, using that front end's
+    # Town (a prices.TownPrices) and Player classes. Returns the journal path to carry on writing to.
+    with Snapshot(path) as snapshot:
+        user_name, journal_path = snapshot.strings("session/name")
+        game.user_name = game.user_name or user_name
+        game.duration, game.days_left, game.town_index = snapshot["session/days"].tolist()
+        product_names = snapshot.strings("session/products")
+        game.world_map = unpack_world_map(snapshot)
+        game.seed = int(snapshot["session/seed"][0])
+        for (name, subsystem), position in zip(SESSION_STREAMS, snapshot["session/streams"].tolist()):
+            setattr(game, name, Stream(stream_key(game.seed, subsystem), position))
+        game.price_table = restore_price_table(game.world_map.town_names, product_names, snapshot["prices/base_prices"],
+                                               snapshot["prices/history"], int(snapshot["prices/days"][0]),
+                                               game.market_rng)
+        game.towns = game.price_table.towns(town_class)
+        game.current_town = game.towns[game.town_index]
+        game.player = player_class(product_names, int(snapshot["session/money"][0]))
+        game.player.inventory = array('q', snapshot["session/inventory"].tobytes())
+    return journal_path
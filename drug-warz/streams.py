@@ -0,0 +1,85 @@
+import secrets
+
+import numpy as np
+
+# Counter-based random numbers. A stream is a Philox key built from a seed and
+# a subsystem (the market, encounters, a policy), and its n-th number depends
+# only on that key and n: not on what other streams have drawn, which process
+# plays the game or how many games a worker played before it. One seed gives
+# every subsystem of every game a stream of its own, and a stream can be saved
+# as (key, position) and picked up again anywhere.
+#
+# Numbers are drawn from Philox a block at a time and handed out one by one,
+# so a draw costs about what random.Random's does.
+
+SUBSYSTEMS = {"market": 0, "encounters": 1, "policy": 2}
+BLOCK = 256  # Numbers per Philox call; a multiple of 4, the numbers Philox makes per counter step
+
+
+def new_seed():
+    return secrets.randbits(63)
+
+
+def stream_key(seed, subsystem):
+    # Philox takes a 128-bit key: the seed in the low 64 bits, the subsystem above it
+    return (seed % 2 ** 64) | SUBSYSTEMS[subsystem] << 64
+
+
+class Stream:
+    __slots__ = ("key", "block", "index", "skip", "values", "generator")
+
+    def __init__(self, key, position=0):
+        self.key = key
+        self.block, self.skip = divmod(position, BLOCK)
+        self.index = BLOCK  # Nothing drawn from Philox yet; the first draw fills the block
+        self.values = None
+        self.generator = None
+
+    @classmethod
+    def for_subsystem(cls, seed, subsystem):
+        return cls(stream_key(seed, subsystem))
+
+    @property
+    def position(self):
+        # Numbers drawn so far
+        if self.generator is None:
+            return self.block * BLOCK + self.skip
+        return self.block * BLOCK + self.index
+
+    def fill(self):
+        # Draws the next block and returns where to read from in it
+        if self.generator is None:
+            # Jump straight to the block holding the position; later blocks follow on
+            self.generator = np.random.Generator(np.random.Philox(key=self.key, counter=self.block * (BLOCK // 4)))
+            index = self.skip
+        else:
+            self.block += 1
+            index = 0
+        self.values = self.generator.random(BLOCK).tolist()
+        return index
+
+    def random(self):
+        index = self.index
+        if index == BLOCK:
+            index = self.fill()
+        self.index = index + 1
+        return self.values[index]
+
+    def uniform(self, a, b):
+        # random() written out again: prices call this more than anything else
+        index = self.index
+        if index == BLOCK:
+            index = self.fill()
+        self.index = index + 1
+        return a + (b - a) * self.values[index]
+
+    def randrange(self, start, stop=None):
+        if stop is None:
+            start, stop = 0, start
+        return start + int(self.random() * (stop - start))
+
+    def randint(self, a, b):
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
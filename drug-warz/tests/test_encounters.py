@@ -0,0 +1,69 @@
+from array import array
+
+import numpy as np
+
+from core import Game, Player, Policy, Rules
+from encounters import EncounterTable
+
+PRODUCTS = ["Weed", "Speed"]
+
+
+def one_trip(table, player, draws, responses):
+    # A trip for one player from the same draws sample_travel uses, losing through Player.lose
+    for (type, chance, escapes), (meet, escape) in zip(table.rows, draws):
+        if meet >= chance:
+            continue
+        response = responses.get(type, ("run",))
+        away = escape < escapes.get(response[0], 0.0)
+        if response[0] == "bribe":
+            if player.money >= response[1]:
+                player.money -= response[1]
+            else:
+                away = False
+        if not away:
+            player.lose(table.loss_fraction)
+            return
+
+
+def test_sample_travel_loses_what_player_lose_does():
+    table = EncounterTable([("police", 0.6, {"run": 0.4, "bribe": 0.7}), ("gang", 0.5, {"fight": 0.3})], 0.137)
+    responses = {"police": ("bribe", 2501)}
+    rng = np.random.default_rng(0)
+    money = rng.integers(0, 10 ** 7, 5000)
+    inventory = rng.integers(0, 1000, (5000, len(PRODUCTS)))
+    players = []
+    for cents, held in zip(money.tolist(), inventory.tolist()):
+        player = Player(PRODUCTS, cents)
+        player.inventory = array('q', held)
+        players.append(player)
+    draws = np.random.default_rng(1).random((len(players), len(table.rows), 2))
+    table.sample_travel(money, inventory, responses, rng=np.random.default_rng(1))
+    for player, player_draws in zip(players, draws.tolist()):
+        one_trip(table, player, player_draws, responses)
+    assert money.dtype == np.int64
+    assert money.tolist() == [player.money for player in players]
+    assert inventory.tolist() == [list(player.inventory) for player in players]
+
+
+def test_money_distribution_is_whole_cents():
+    table = EncounterTable(loss_fraction=0.137)
+    for money in (0, 1, 12345, 10 ** 6 + 7):
+        distribution = table.money_distribution(money, {"police": ("bribe", 333)})
+        assert abs(sum(probability for _, probability in distribution) - 1) < 1e-12
+        for after, _ in distribution:
+            assert isinstance(after, int)
+        player = Player(PRODUCTS, money)
+        player.lose(table.loss_fraction)
+        assert player.money in [after for after, _ in distribution]
+
+
+def test_view_reads_the_encounter_table_without_handing_it_out():
+    table = EncounterTable([("police", 0.6, {"run": 0.4, "bribe": 0.7}), ("gang", 0.5, {"fight": 0.3})], 0.137)
+    game = Game(Policy(), Rules(encounters=table), seed=0)
+    view = game.view
+    assert view.encounter_types == ("police", "gang")
+    assert view.encounter_chance("gang") == 0.5
+    assert view.escape_chance("police", "bribe") == 0.7
+    assert view.escape_chance("gang", "run") == 0.0
+    assert view.loss_fraction == 0.137
+    assert not hasattr(view, "encounters")
@@ -0,0 +1,56 @@
+import random
+import statistics
+from array import array
+
+import pytest
+
+from history import PriceHistory
+from prices import PriceTable
+from streams import Stream
+
+
+def test_window_stats_match_the_last_week():
+    rng = random.Random(0)
+    history = PriceHistory(3, 7)
+    prices = []
+    for _ in range(40):
+        row = [rng.randint(400, 6000) for _ in range(3)]
+        history.add(array('q', row))
+        prices.append(row)
+        for series in range(3):
+            past = [row[series] for row in prices]
+            window = past[-7:]
+            changes = [(b - a) / a * 100 for a, b in zip(past, past[1:])][-7:]
+            assert history.latest(series) == past[-1]
+            assert history.previous(series) == past[-2 if len(past) > 1 else -1]
+            assert history.low(series) == min(window)
+            assert history.high(series) == max(window)
+            assert history.average(series) == pytest.approx(statistics.mean(window))
+            if len(changes) >= 2:
+                assert history.volatility(series) == pytest.approx(statistics.stdev(changes))
+
+
+def test_restore_gives_the_same_window():
+    history = PriceHistory(2, 7)
+    for price in (1000, 1250, 900, 1100, 3000, 800, 1400, 1300, 1200):
+        history.add(array('q', [price, price * 2]))
+    restored = PriceHistory(2, 7)
+    restored.restore(history.ring.tobytes(), history.count)
+    assert [restored.summary(series) for series in range(2)] == [history.summary(series) for series in range(2)]
+    history.add(array('q', [500, 600]))
+    restored.add(array('q', [500, 600]))
+    assert [restored.summary(series) for series in range(2)] == [history.summary(series) for series in range(2)]
+
+
+def test_table_towns_read_their_row():
+    names = ["Weed", "Speed", "Acid"]
+    table = PriceTable(["A", "B"], names, [1000, 2000, 3000], Stream.for_subsystem(5, "market"))
+    for _ in range(10):
+        before = [table.prices(town) for town in range(2)]
+        table.update_prices()
+        for town in table.towns():
+            assert town.previous_prices() == before[town.index]
+            assert town.prices() == tuple(product.current_price for product in town.products)
+            for product in town.products:
+                assert 0.8 * product.base_price <= product.current_price <= 1.2 * product.base_price
+    assert table.memory_size() == 8 * len(names) + 64 * 2 * len(names)
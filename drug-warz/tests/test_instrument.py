@@ -0,0 +1,29 @@
+from core import Game, Rules, GreedyPolicy, RandomPolicy
+from instrument import instrument
+
+
+def positions(game):
+    return game.market_rng.position + game.encounter_rng.position + game.policy_rng.position
+
+
+def test_draws_per_turn_add_up_to_the_streams(capsys):
+    for policy in (GreedyPolicy(), RandomPolicy()):
+        game = Game(policy, Rules(duration=20), 4)
+        before = positions(game)
+        instruments = instrument(game)
+        game.start()
+        instruments.finish()
+        draws = [turn["draws"] for turn in instruments.turns]
+        assert len(draws) == 20
+        assert all(count > 0 for count in draws)  # Every day moves every price
+        assert sum(draws) == positions(game) - before
+        assert "random draws" in capsys.readouterr().out
+
+
+def test_finish_puts_the_game_back():
+    game = Game(GreedyPolicy(), Rules(duration=5), 1)
+    instruments = instrument(game)
+    assert "travel" in vars(game)
+    instruments.finish()
+    assert "travel" not in vars(game)
+    assert "update_prices" not in vars(game.price_table)
@@ -0,0 +1,43 @@
+import math
+import random
+
+from leaderboard import BULK_GAMES, Leaderboard, bucket, bucket_floor
+
+
+def random_scores(rng, games):
+    # Cents from nothing to billions of dollars, with plenty of ties
+    scores = [rng.choice([0, 1, 127, 128, 129, 1000000]) for _ in range(games // 10)]
+    scores += [int(10 ** rng.uniform(0, 14)) for _ in range(games - len(scores))]
+    return [(f"player {i}", rng.choice([30, 45, 90]), i, score) for i, score in enumerate(scores)]
+
+
+def test_buckets_cover_every_score_once():
+    for score in list(range(5000)) + [2 ** 40 - 1, 2 ** 40, 2 ** 40 + 1, 10 ** 14]:
+        number = bucket(score)
+        assert bucket_floor(number) <= score < bucket_floor(number + 1)
+
+
+def test_rank_and_percentile_match_sorting():
+    rng = random.Random(0)
+    games = random_scores(rng, 2000)
+    with Leaderboard(":memory:") as board:
+        board.add_many(games[:1500])
+        with board.bulk(BULK_GAMES):  # Drops the indexes and builds them again
+            board.add_many(games[1500:])
+        for duration in (None, 30, 45, 90):
+            scores = sorted(score for _, length, _, score in games if duration in (None, length))
+            assert board.count(duration) == len(scores)
+            asked = [rng.choice(scores) for _ in range(100)] + [int(10 ** rng.uniform(0, 15)) for _ in range(100)]
+            for score in asked + [0, scores[-1] + 1]:
+                assert board.rank(score, duration) == 1 + sum(other > score for other in scores)
+            for percent in [0, 0.1, 1, 25, 50, 90, 99, 99.9, 100] + [rng.uniform(0, 100) for _ in range(50)]:
+                position = min(max(math.ceil(percent / 100 * len(scores)), 1), len(scores)) - 1
+                assert board.percentile(percent, duration) == scores[position]
+            assert [score for *_, score in board.top(5, duration)] == scores[::-1][:5]
+
+
+def test_empty_board():
+    with Leaderboard(":memory:") as board:
+        assert board.percentile(50) is None
+        assert board.rank(100) == 1
+        assert board.add("only", 30, 500) == 1
@@ -0,0 +1,27 @@
+import numpy as np
+
+from market import Market, TK_COLORS
+
+
+def test_prices_stay_whole_cents_within_the_fluctuation():
+    market = Market.random(towns=5, products=8, games=3, seed=1)
+    for _ in range(10):
+        market.update_prices()
+        prices = market.current_prices
+        assert (prices == np.rint(prices)).all()
+        assert (prices >= np.floor(market.base_prices * 0.8)).all()
+        assert (prices <= np.ceil(market.base_prices * 1.2)).all()
+
+
+def test_change_and_colors_match_the_per_product_rule():
+    market = Market.random(towns=5, products=8, games=3, seed=2)
+    market.update_prices()
+    change = market.price_change_percentage().copy()
+    colors = market.colors(change)
+    for index in np.ndindex(market.shape):
+        current, previous = market.current_prices[index], market.previous_prices[index]
+        expected = round((current - previous) / previous * 100, 2)
+        assert change[index] == expected
+        assert colors[index] == ("green" if expected > 0 else "red" if expected < 0 else "black")
+    assert (market.colors() == colors).all()
+    assert set(TK_COLORS) >= set(colors.ravel())
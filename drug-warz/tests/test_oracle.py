@@ -0,0 +1,122 @@
+import functools
+import random
+
+from core import Game, GreedyPolicy, Rules, cents
+from oracle import price_schedule, solve
+from world_map import WorldMap
+
+
+def trip_days(world_map, a, b):
+    # Days a travel action uses, as Game.travel counts them
+    if world_map is None or a == b:
+        return 1
+    return world_map.travel_days(a, b)
+
+
+def brute_force(prices, money, start_town=0, world_map=None):
+    # Most money any sequence of actions ends with: every town, product and
+    # quantity is tried, and several products can be held at once
+    towns = len(prices[0])
+    products = len(prices[0][0])
+
+    @functools.lru_cache(maxsize=None)
+    def best(turn, days_left, town, money, inventory):
+        if days_left == 0:
+            return money
+        today = prices[turn][town]
+        results = [money]  # A trip too long for the days left ends the game where it stands
+        for other in range(towns):
+            days = trip_days(world_map, town, other)
+            if days is not None and days <= days_left:
+                results.append(best(turn + 1, days_left - days, other, money, inventory))
+        for product in range(products):
+            price = today[product]
+            for quantity in range(1, money // price + 1):
+                held = inventory[:product] + (inventory[product] + quantity,) + inventory[product + 1:]
+                results.append(best(turn + 1, days_left - 1, town, money - quantity * price, held))
+            for quantity in range(1, inventory[product] + 1):
+                held = inventory[:product] + (inventory[product] - quantity,) + inventory[product + 1:]
+                results.append(best(turn + 1, days_left - 1, town, money + quantity * price, held))
+        return max(results)
+
+    return best(0, len(prices), start_town, money, (0,) * products)
+
+
+def follow(prices, money, plan, start_town=0, world_map=None):
+    # Plays a plan by the rules and returns the money it ends with
+    town = start_town
+    days_left = len(prices)
+    inventory = {}
+    for turn, action in enumerate(plan):
+        assert days_left > 0
+        if action[0] == "travel":
+            days = trip_days(world_map, town, action[1])
+            assert days is not None and days <= days_left
+            days_left -= days
+            town = action[1]
+            continue
+        days_left -= 1
+        _, product, quantity = action
+        price = prices[turn][town][product]
+        if action[0] == "buy":
+            assert quantity * price <= money
+            money -= quantity * price
+            inventory[product] = inventory.get(product, 0) + quantity
+        else:
+            assert quantity <= inventory.get(product, 0)
+            money += quantity * price
+            inventory[product] -= quantity
+    return money
+
+
+def random_prices(rng, days, towns, products):
+    return [[[rng.randint(100, 600) for _ in range(products)] for _ in range(towns)] for _ in range(days)]
+
+
+def test_change_buys_a_second_product():
+    # Three of the first product leave 177 cents, enough for one of the second the next day
+    prices = [[[188, 275]], [[374, 154]], [[453, 261]], [[234, 202]]]
+    best, plan = solve(prices, 741)
+    assert best == brute_force(prices, 741) == 1584
+    assert follow(prices, 741, plan) == best
+
+
+def test_matches_brute_force_on_small_worlds():
+    # Four days is the shortest game that can buy two products and sell both
+    rng = random.Random(0)
+    for _ in range(500):
+        prices = random_prices(rng, 4, rng.randint(1, 2), 3)
+        money = rng.randint(0, 1000)
+        best, plan = solve(prices, money)
+        assert best == brute_force(prices, money)
+        assert len(plan) <= len(prices)
+        assert follow(prices, money, plan) == best
+
+
+def random_map(rng, towns):
+    # Roads of one to three days between some pairs of towns, not always connected
+    names = [f"Town {town}" for town in range(towns)]
+    roads = [(names[a], names[b], rng.randint(1, 3))
+             for a in range(towns) for b in range(a + 1, towns) if rng.random() < 0.6]
+    return WorldMap(names, roads)
+
+
+def test_matches_brute_force_on_small_maps():
+    rng = random.Random(1)
+    for _ in range(300):
+        towns = rng.randint(2, 3)
+        world_map = random_map(rng, towns)
+        prices = random_prices(rng, 4, towns, 3)
+        money = rng.randint(0, 1000)
+        best, plan = solve(prices, money, world_map=world_map)
+        assert best == brute_force(prices, money, world_map=world_map)
+        assert follow(prices, money, plan, world_map=world_map) == best
+
+
+def test_no_policy_beats_the_oracle():
+    rules = Rules(duration=30)
+    for seed in range(5):
+        game = Game(GreedyPolicy(), rules, seed)
+        game.start()
+        best, _ = solve(price_schedule(seed, rules), cents(rules.starting_money))
+        assert game.player.money <= best
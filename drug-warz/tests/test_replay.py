@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from core import Game, Rules, GreedyPolicy, Policy, POLICIES, cents
+from journal import Journal, PRICE
+from replay import replay, read_journal
+from world_map import WorldMap
+
+MAPS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "maps")
+
+
+def play_journaled(path, rules, seed, policy=None):
+    journal = Journal(path, rules.town_names, rules.product_names)
+    game = Game(policy or GreedyPolicy(), rules, seed, journal)
+    game.start()
+    journal.close()
+    return game
+
+
+class Tourist(Policy):
+    # Goes round the towns trading between trips, bribing whoever stops them, and
+    # notes where the game stands at the start of every turn
+    def __init__(self):
+        self.game = None
+        self.turns = []
+
+    def choose_action(self, view):
+        game = self.game
+        self.turns.append((game.day, game.days_left, game.player.money, game.town_index))
+        if len(self.turns) % 2:
+            return ("travel", (view.town + 1) % len(view.town_names))
+        if view.inventory[0]:
+            return ("sell", 0, view.inventory[0])
+        return ("buy", 0, view.money // view.prices[0])
+
+    def choose_encounter(self, view, type):
+        return ("bribe", 1000)
+
+
+@pytest.mark.parametrize("map_name", [None, "road_trip.json"])
+def test_day_stops_at_the_start_of_that_day(tmp_path, map_name):
+    # On a map a trip can take several days; a day spent on the road stops where the trip ends
+    path = str(tmp_path / "game.dwj")
+    world_map = WorldMap.load(os.path.join(MAPS, map_name)) if map_name else None
+    rules = Rules(duration=30, world_map=world_map)
+    policy = Tourist()
+    game = policy.game = Game(policy, rules, 3, Journal(path, rules.town_names, rules.product_names))
+    game.start()
+    game.journal.close()
+    turns = policy.turns + [(rules.duration, 0, game.player.money, game.town_index)]
+    if map_name:
+        assert len(policy.turns) < rules.duration  # Some trips took more than a day
+    assert game.encounters and game.failures
+    for day in range(1, rules.duration + 1):
+        state = replay(path, until_day=day)
+        assert (state.day, state.days_left, state.money, state.town) == next(
+            turn for turn in turns if turn[0] >= day - 1)
+        assert not state.finished
+    assert replay(path, until_day=1).money == cents(rules.starting_money)
+    assert replay(path).finished
+
+
+def test_report_names_the_towns_of_the_map_played(tmp_path):
+    path = str(tmp_path / "game.dwj")
+    rules = Rules(duration=30, world_map=WorldMap.load(os.path.join(MAPS, "road_trip.json")))
+    game = play_journaled(path, rules, seed=5)
+    state = replay(path)
+    assert state.town_names == rules.town_names
+    assert state.product_names == rules.product_names
+    assert f"in {game.current_town.name}" in state.report()
+
+
+def test_only_the_players_prices_are_journaled(tmp_path):
+    path = str(tmp_path / "game.dwj")
+    rules = Rules(duration=30, world_map=WorldMap.load(os.path.join(MAPS, "road_trip.json")))
+    game = Game(GreedyPolicy(), rules, 5, Journal(path, rules.town_names, rules.product_names))
+    shown = []
+    choose_action = game.policy.choose_action
+
+    def choose_and_note(view):
+        shown.append((game.day, game.town_index, game.current_town.prices()))
+        return choose_action(view)
+    game.policy.choose_action = choose_and_note
+    game.start()
+    game.journal.close()
+    records = [record for record in read_journal(path)[2] if record[0] == PRICE]
+    assert len(records) == len(shown) * len(rules.product_names)
+    assert [(day, town, int(price)) for _, day, town, _, price in records] == [
+        (day, town, price) for day, town, prices in shown for price in prices]
+    state = replay(path)
+    assert state.prices == dict(enumerate(shown[-1][2]))
+    assert f"Prices in {rules.town_names[shown[-1][1]]}:" in state.report()
+
+
+@pytest.mark.parametrize("name", sorted(POLICIES))
+def test_replay_ends_on_the_games_money(tmp_path, name):
+    # Often caught, and losing a fraction that leaves odd cents to round
+    rules = Rules(duration=60, encounter_chance=0.5, loss_fraction=0.137,
+                  world_map=WorldMap.load(os.path.join(MAPS, "road_trip.json")))
+    for seed in range(25):
+        path = str(tmp_path / f"game-{seed}.dwj")
+        game = play_journaled(path, rules, seed, POLICIES[name]())
+        state = replay(path)
+        assert state.money == game.player.money
+        assert [state.inventory.get(p, 0) for p in range(len(rules.product_names))] == list(game.player.inventory)
+        assert state.town == game.town_index
@@ -0,0 +1,56 @@
+from core import Rules
+from encounters import EncounterTable
+from server import World, Session
+from streams import Stream
+from world_map import WorldMap
+
+
+def new_session(seed=1, rules=None):
+    return Session(World(0, rules or Rules(), seed), Stream.for_subsystem(seed, "encounters"))
+
+
+def meet_police(session):
+    # As if travelling to town 1 had just run into the police
+    session.destination = 1
+    session.encounter = ("police", [])
+
+
+def test_bribe_must_be_positive():
+    session = new_session()
+    money = session.player.money
+    for amount in ("-1000000", "0"):
+        meet_police(session)
+        assert session.handle(f"bribe {amount}") == "ERR bad arguments for bribe"
+        assert session.player.money == money
+        assert session.encounter == ("police", [])  # Still waiting for an answer
+
+
+def test_bribe_is_taken_in_dollars():
+    session = new_session()
+    money = session.player.money
+    meet_police(session)
+    session.handle("bribe 5")
+    assert session.encounter is None
+    assert session.player.money <= money - 500
+
+
+def test_new_game_needs_days():
+    session = new_session()
+    for days in ("-3", "0"):
+        assert session.handle(f"new {days}") == "ERR bad arguments for new"
+        assert session.days_left == Rules().duration
+    assert session.handle("new 30") == "OK New game with 30 days"
+    assert session.days_left == 30
+
+
+def test_travel_takes_the_days_of_the_road():
+    world_map = WorldMap(["Atlanta", "Miami", "Los Angeles"], [("Atlanta", "Miami", 2), ("Miami", "Los Angeles", 9)])
+    session = new_session(rules=Rules(duration=10, world_map=world_map, encounters=EncounterTable([])))
+    assert session.handle("travel 1") == "OK Traveled to Miami"
+    assert session.days_left == 8
+    assert session.handle("travel 2").startswith("ERR You can't reach Los Angeles")
+    assert session.days_left == 8
+    assert session.handle("travel 1") == "OK Traveled to Miami"  # Waiting in town takes a day
+    assert session.days_left == 7
+    assert session.handle("travel 0") == "OK Traveled to Atlanta"
+    assert session.days_left == 5
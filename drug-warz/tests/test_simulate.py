@@ -0,0 +1,56 @@
+import random
+import statistics
+from types import SimpleNamespace
+
+import pytest
+
+from core import Game, Rules, POLICIES, cents
+from leaderboard import Leaderboard
+from simulate import Stats, run_batch
+
+
+def finished_game(money):
+    return SimpleNamespace(player=SimpleNamespace(money=money), encounters=0, failures=0)
+
+
+def stats_of(scores):
+    stats = Stats()
+    for money in scores:
+        stats.add(finished_game(money))
+    return stats
+
+
+def test_variance_is_exact_for_close_large_scores():
+    rng = random.Random(0)
+    scores = [10 ** 12 + rng.randrange(100) for _ in range(100000)]
+    assert stats_of(scores).variance() == statistics.variance(scores)
+
+
+def test_merged_chunks_match_one_pass():
+    rng = random.Random(1)
+    scores = [rng.randrange(10 ** 9) for _ in range(1000)]
+    merged = Stats()
+    for first in range(0, len(scores), 137):
+        merged.merge(stats_of(scores[first:first + 137]))
+    whole = stats_of(scores)
+    assert vars(merged) == vars(whole)
+    assert merged.variance() == statistics.variance(scores)
+    assert merged.mean() == statistics.mean(scores)
+
+
+@pytest.mark.parametrize("name", sorted(POLICIES))
+def test_batches_agree_whatever_the_workers_and_chunks(name):
+    rules = Rules(duration=20)
+    games = 40
+    expected = Stats(cents(rules.starting_money))
+    for seed in range(5, 5 + games):
+        game = Game(POLICIES[name](), rules, seed)
+        game.start()
+        expected.add(game)
+    scores = set()
+    for workers, chunk_size in ((1, 1000), (1, 7), (3, 1), (3, 7), (4, 13)):
+        with Leaderboard(":memory:") as board:
+            stats = run_batch(rules, name, games, workers, 5, chunk_size, board)
+            scores.add(tuple(board.connection.execute("SELECT seed, score FROM scores ORDER BY seed")))
+        assert vars(stats) == vars(expected)
+    assert len(scores) == 1
@@ -0,0 +1,74 @@
+import pytest
+
+from core import Game, Rules, POLICIES
+from snapshot import save_games, load_games, GAME_STATE
+from world_map import WorldMap
+
+
+def state(game):
+    return ([getattr(game, name) for name in GAME_STATE], game.player.money, list(game.player.inventory),
+            [[(product.base_price, product.current_price, product.previous_price) for product in town.products]
+             for town in game.towns],
+            list(game.price_table.history.ring), game.price_table.history.count,
+            [stream.position for stream in (game.market_rng, game.encounter_rng, game.policy_rng)])
+
+
+@pytest.mark.parametrize("name", sorted(POLICIES))
+def test_round_trip_keeps_every_game(tmp_path, name):
+    path = str(tmp_path / "games.dws")
+    policy = POLICIES[name]()
+    rules = Rules(duration=30, world_map=WorldMap.grid(3, 2, seed=1))
+    games = [Game(policy, rules, seed) for seed in range(20)]
+    for game in games:
+        game.start(days=12)
+    save_games(path, games)
+    loaded = load_games(path, policy)
+    assert [state(game) for game in loaded] == [state(game) for game in games]
+
+
+@pytest.mark.parametrize("name", sorted(POLICIES))
+def test_resumed_games_end_like_unbroken_ones(tmp_path, name):
+    path = str(tmp_path / "games.dws")
+    policy = POLICIES[name]()
+    rules = Rules(duration=30)
+    unbroken = [Game(policy, rules, seed) for seed in range(20)]
+    for game in unbroken:
+        game.start()
+    paused = [Game(policy, rules, seed) for seed in range(20)]
+    for game in paused:
+        game.start(days=7)
+    save_games(path, paused)
+    resumed = load_games(path, policy, rules)
+    for game in resumed:
+        game.start()
+    assert [state(game) for game in resumed] == [state(game) for game in unbroken]
+
+
+def test_a_batch_with_finished_games_loads_whole(tmp_path):
+    path = str(tmp_path / "games.dws")
+    policy = POLICIES["random"]()
+    rules = Rules(duration=30, world_map=WorldMap.grid(3, 2, seed=1))
+    games = [Game(policy, rules, seed) for seed in range(40)]
+    for game in games:
+        game.start(days=28)  # A trip can use up the last two days
+    games[0].quit = True
+    finished = [game.days_left <= 0 or game.quit for game in games]
+    assert 1 < sum(finished[1:]) < len(games) - 1
+    save_games(path, games)
+    loaded = load_games(path, policy)
+    assert [state(game) for game in loaded] == [state(game) for game in games]
+    for game, unbroken in zip(loaded, games):
+        game.start()
+        unbroken.start()
+    assert [state(game) for game in loaded] == [state(game) for game in games]
+    assert [state(game) for game, done in zip(loaded, finished) if done] == [
+        state(game) for game, done in zip(load_games(path, policy), finished) if done]
+
+
+def test_a_quit_game_plays_no_more_days():
+    game = Game(POLICIES["greedy"](), Rules(duration=10), 1)
+    game.start(days=3)
+    game.quit = True
+    before = state(game)
+    game.start()
+    assert state(game) == before
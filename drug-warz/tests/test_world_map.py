@@ -0,0 +1,39 @@
+import math
+import random
+
+from world_map import WorldMap
+
+
+def floyd_warshall(towns, roads):
+    days = [[0 if a == b else math.inf for b in range(towns)] for a in range(towns)]
+    for a, b, length in roads:
+        days[a][b] = days[b][a] = min(days[a][b], length)
+    for via in range(towns):
+        for a in range(towns):
+            for b in range(towns):
+                if days[a][via] + days[via][b] < days[a][b]:
+                    days[a][b] = days[a][via] + days[via][b]
+    return days
+
+
+def test_travel_days_match_floyd_warshall():
+    rng = random.Random(0)
+    for _ in range(50):
+        towns = rng.randint(1, 8)
+        roads = [(rng.randrange(towns), rng.randrange(towns), rng.randint(1, 5))
+                 for _ in range(rng.randint(0, 12))]
+        roads = [road for road in roads if road[0] != road[1]]
+        world_map = WorldMap([f"Town {town}" for town in range(towns)], roads, cache_size=rng.randint(1, 4))
+        expected = floyd_warshall(towns, roads)
+        for a in range(towns):
+            for b in range(towns):
+                days = world_map.travel_days(a, b)
+                assert days == (None if expected[a][b] == math.inf else expected[a][b])
+                route = world_map.route(a, b)
+                if days is None:
+                    assert route is None
+                else:
+                    assert route[0] == a and route[-1] == b
+                    legs = [min(length for x, y, length in roads if {x, y} == {c, d})
+                            for c, d in zip(route, route[1:])]
+                    assert sum(legs) == days
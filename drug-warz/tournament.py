@@ -0,0 +1,109 @@
+import argparse
+import importlib
+import importlib.util
+import multiprocessing
+import os
+import time
+
+from core import Game, Rules, POLICIES, DURATIONS, cents
+from encounters import EncounterTable
+from simulate import Stats
+from world_map import WorldMap
+
+# Tournament: every bot plays the same seeded worlds (same prices, same
+# encounter rolls) across worker processes, and the results are compared
+# side by side. A bot is any core.Policy; it gets a read-only GameView and
+# runs in the worker's own process, so a decision is a plain method call.
+#
+# Bots are named by their POLICIES key, "module:Class" or "path/to/file.py:Class":
+#
+#   python tournament.py --bots random greedy briber mybots.py:Hoarder --games 10000
+
+
+def load_bot(spec):
+    if spec in POLICIES:
+        return POLICIES[spec]
+    location, _, class_name = spec.rpartition(":")
+    if not location or not class_name:
+        raise ValueError(f"unknown bot {spec!r}; use one of {sorted(POLICIES)} or module:Class")
+    if location.endswith(".py"):
+        name = os.path.splitext(os.path.basename(location))[0]
+        module_spec = importlib.util.spec_from_file_location(name, location)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(location)
+    return getattr(module, class_name)
+
+
+def run_chunk(args):
+    # Every seed in the chunk is played once by every bot
+    rules, specs, first_seed, count = args
+    bots = [load_bot(spec)() for spec in specs]
+    results = {spec: [Stats(cents(rules.starting_money)), 0.0] for spec in specs}
+    clock = time.perf_counter
+    for seed in range(first_seed, first_seed + count):
+        for spec, bot in zip(specs, bots):
+            start = clock()
+            game = Game(bot, rules, seed)
+            game.start()
+            result = results[spec]
+            result[1] += clock() - start
+            result[0].add(game)
+    return results
+
+
+def run_tournament(rules, specs, games=10000, workers=None, seed=0, chunk_size=250):
+    for spec in specs:
+        load_bot(spec)  # Fail here rather than in every worker
+    chunks = []
+    for first in range(0, games, chunk_size):
+        chunks.append((rules, specs, seed + first, min(chunk_size, games - first)))
+    results = {spec: [Stats(cents(rules.starting_money)), 0.0] for spec in specs}
+    with multiprocessing.Pool(workers) as pool:
+        for chunk_results in pool.imap_unordered(run_chunk, chunks):
+            for spec, (stats, seconds) in chunk_results.items():
+                results[spec][0].merge(stats)
+                results[spec][1] += seconds
+    return results
+
+
+def report(results):
+    lines = [f"{'bot':28} {'games':>7} {'mean $':>11} {'stdev $':>10} {'variance':>14} {'min $':>10} "
+             f"{'max $':>11} {'profit %':>8} {'caught':>6} {'games/s':>8}"]
+    ranked = sorted(results.items(), key=lambda item: -item[1][0].mean())
+    for spec, (stats, seconds) in ranked:
+        lines.append(f"{spec:28} {stats.games:7} {stats.mean() / 100:11.2f} {stats.stdev() / 100:10.2f} "
+                     f"{stats.variance() / 10000:14.4g} {stats.lowest / 100:10.2f} {stats.highest / 100:11.2f} {100 * stats.profitable / stats.games:8.2f} "
+                     f"{stats.failures / stats.games:6.2f} {stats.games / max(seconds, 1e-9):8,.0f}")
+    lines.append("games/s is per CPU second spent in that bot's games.")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play bots against each other on identical seeded worlds.")
+    parser.add_argument("--bots", nargs="+", default=sorted(POLICIES),
+                        help="POLICIES names, module:Class or file.py:Class")
+    parser.add_argument("--games", type=int, default=10000, help="seeded worlds; every bot plays each one")
+    parser.add_argument("--duration", type=int, default=45, help=f"days per game, e.g. {DURATIONS}")
+    parser.add_argument("--starting-money", type=float, default=10000)
+    parser.add_argument("--encounters", help="JSON encounter table (see encounters.py)")
+    parser.add_argument("--map", help="JSON map of towns and roads (see maps/)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rules = Rules(duration=args.duration, starting_money=args.starting_money,
+                  encounters=EncounterTable.load(args.encounters) if args.encounters else None,
+                  world_map=WorldMap.load(args.map) if args.map else None)
+    start = time.perf_counter()
+    results = run_tournament(rules, args.bots, args.games, args.workers, args.seed, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(report(results))
+    total = sum(stats.games for stats, _ in results.values())
+    print(f"Elapsed: {elapsed:.2f}s ({total / elapsed:,.0f} games/sec over all bots)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import queue
+import threading
+
+# A background thread for work too slow for the Tk thread. Jobs run one at a
+# time in the order they were submitted. Results wait in a queue until the
+# Tk thread calls deliver(), so callbacks only ever run on the Tk thread.
+
+
+class Worker:
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, job, callback, *args):
+        # callback(result, error) runs on the Tk thread once job(*args) is done
+        self.jobs.put((job, args, callback))
+
+    def run(self):
+        while True:
+            work = self.jobs.get()
+            if work is None:
+                break
+            job, args, callback = work
+            try:
+                self.results.put((callback, job(*args), None))
+            except Exception as error:
+                self.results.put((callback, None, error))
+
+    def deliver(self):
+        # Called from the Tk thread, typically on every frame tick
+        while True:
+            try:
+                callback, result, error = self.results.get_nowait()
+            except queue.Empty:
+                return
+            callback(result, error)
+
+    def stop(self):
+        self.jobs.put(None)
@@ -0,0 +1,189 @@
+import heapq
+import json
+import os
+import random
+from array import array
+from collections import OrderedDict
+
+# The world as a graph: towns joined by roads that take a whole number of days.
+# Maps are JSON files in maps/:
+#
+#   {"towns": ["Atlanta", "Miami", ...], "roads": [["Atlanta", "Miami", 2], ...]}
+#
+# Roads go both ways. Travel takes the shortest route. Shortest routes from a
+# town are worked out (Dijkstra) the first time anyone leaves it and are kept,
+# so every later question about that town is an array lookup. Small maps work
+# out every town up front. Big maps keep the most recently used cache_size towns.
+
+MAP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps")
+DEFAULT_MAP = os.path.join(MAP_DIR, "default.json")
+PRECOMPUTE_LIMIT = 500  # Maps this small get every route at load time
+UNREACHABLE = -1
+
+
+class WorldMap:
+    def __init__(self, town_names, roads, cache_size=256):
+        self.name_towns(town_names, cache_size)
+        # Adjacency in compressed rows: the roads out of town t are
+        # neighbors[offsets[t]:offsets[t + 1]], with days in the same slots of days
+        degree = [0] * (self.town_count + 1)
+        ends = []
+        for a, b, days in roads:
+            a = self.index(a)
+            b = self.index(b)
+            if days < 1:
+                raise ValueError(f"road from {self.town_names[a]} to {self.town_names[b]} must take at least one day")
+            ends.append((a, b, days))
+            degree[a + 1] += 1
+            degree[b + 1] += 1
+        for t in range(self.town_count):
+            degree[t + 1] += degree[t]
+        self.offsets = array('q', degree)
+        self.neighbors = array('q', bytes(8 * degree[-1]))
+        self.days = array('q', bytes(8 * degree[-1]))
+        fill = list(degree[:-1])
+        for a, b, days in ends:
+            for start, end in ((a, b), (b, a)):
+                slot = fill[start]
+                self.neighbors[slot] = end
+                self.days[slot] = days
+                fill[start] = slot + 1
+        self.warm_up()
+
+    @classmethod
+    def from_arrays(cls, town_names, offsets, neighbors, days, cache_size=256):
+        # Straight from the compressed rows, as snapshot.py stores them
+        world = cls.__new__(cls)
+        world.name_towns(town_names, cache_size)
+        world.offsets = array('q', bytes(offsets))
+        world.neighbors = array('q', bytes(neighbors))
+        world.days = array('q', bytes(days))
+        world.warm_up()
+        return world
+
+    @classmethod
+    def load(cls, path=DEFAULT_MAP, cache_size=256):
+        with open(path) as map_file:
+            data = json.load(map_file)
+        return cls(data["towns"], data["roads"], cache_size)
+
+    @classmethod
+    def complete(cls, town_names, days=1):
+        # Every town one road away from every other, as the game has always been
+        return cls(town_names, [(a, b, days) for a in range(len(town_names)) for b in range(a + 1, len(town_names))])
+
+    @classmethod
+    def grid(cls, width, height, seed=None, shortcuts=0.05, max_days=3):
+        # A connected width x height grid of towns with random road lengths and a
+        # few long roads across it, for testing big worlds
+        rng = random.Random(seed)
+        names = [f"Town {i}" for i in range(width * height)]
+        roads = []
+        for y in range(height):
+            for x in range(width):
+                town = y * width + x
+                if x + 1 < width:
+                    roads.append((town, town + 1, rng.randint(1, max_days)))
+                if y + 1 < height:
+                    roads.append((town, town + width, rng.randint(1, max_days)))
+        for _ in range(int(len(names) * shortcuts)):
+            a, b = rng.randrange(len(names)), rng.randrange(len(names))
+            if a != b:
+                roads.append((a, b, rng.randint(max_days, max_days * 4)))
+        return cls(names, roads)
+
+    def name_towns(self, town_names, cache_size):
+        self.town_names = list(town_names)
+        self.town_count = len(self.town_names)
+        self.indexes = {name: i for i, name in enumerate(self.town_names)}
+        self.cache_size = max(cache_size, 1)
+        self.routes = OrderedDict()  # town -> (days to every town, previous town on the way)
+
+    def warm_up(self):
+        if self.town_count <= PRECOMPUTE_LIMIT:
+            self.cache_size = max(self.cache_size, self.town_count)
+            self.precompute()
+
+    def save(self, path):
+        names = self.town_names
+        roads = []
+        for a in range(self.town_count):
+            for slot in range(self.offsets[a], self.offsets[a + 1]):
+                b = self.neighbors[slot]
+                if a < b:
+                    roads.append([names[a], names[b], self.days[slot]])
+        with open(path, "w") as map_file:
+            json.dump({"towns": names, "roads": roads}, map_file)
+
+    def index(self, town):
+        if isinstance(town, int):
+            if not 0 <= town < self.town_count:
+                raise ValueError(f"no town {town}")
+            return town
+        try:
+            return self.indexes[town]
+        except KeyError:
+            raise ValueError(f"no town called {town!r}") from None
+
+    def roads_from(self, town):
+        start, end = self.offsets[town], self.offsets[town + 1]
+        return list(zip(self.neighbors[start:end], self.days[start:end]))
+
+    def shortest_routes(self, source):
+        # Dijkstra from source over the whole map
+        offsets, neighbors, days = self.offsets, self.neighbors, self.days
+        distance = array('q', [UNREACHABLE]) * self.town_count
+        previous = array('q', [UNREACHABLE]) * self.town_count
+        distance[source] = 0
+        queue = [(0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while queue:
+            so_far, town = pop(queue)
+            if so_far > distance[town]:
+                continue
+            for slot in range(offsets[town], offsets[town + 1]):
+                other = neighbors[slot]
+                total = so_far + days[slot]
+                best = distance[other]
+                if best == UNREACHABLE or total < best:
+                    distance[other] = total
+                    previous[other] = town
+                    push(queue, (total, other))
+        return distance, previous
+
+    def routes_from(self, source):
+        routes = self.routes.get(source)
+        if routes is None:
+            routes = self.shortest_routes(source)
+            self.routes[source] = routes
+            if len(self.routes) > self.cache_size:
+                self.routes.popitem(last=False)
+        elif len(self.routes) > 1:
+            self.routes.move_to_end(source)
+        return routes
+
+    def precompute(self):
+        for source in range(self.town_count):
+            self.routes_from(source)
+
+    def travel_days(self, a, b):
+        # Days the shortest route from a to b takes, or None if there is no way there
+        days = self.routes_from(a)[0][b]
+        return None if days == UNREACHABLE else days
+
+    def route(self, a, b):
+        # Towns along the shortest route, a and b included
+        distance, previous = self.routes_from(a)
+        if distance[b] == UNREACHABLE:
+            return None
+        towns = [b]
+        while b != a:
+            b = previous[b]
+            towns.append(b)
+        towns.reverse()
+        return towns
+
+    def destinations(self, town):
+        # (town, days) for every other town that can be reached
+        distance = self.routes_from(town)[0]
+        return [(other, days) for other, days in enumerate(distance) if days != UNREACHABLE and other != town]